@@ -1,17 +1,162 @@
 import sys
+import time
 
-from typing import List
+from typing import List, Optional
 
+from nevec.cache.cache import CheckCache, CheckResult
 from nevec.check.type import TypeCheck
+from nevec.ctx.ctx import CompilationContext
+from nevec.err.report import Report
 from nevec.parse.parse import Parse
 from nevec.ir.toir import ToIr
-from nevec.ir.reg import InterferenceGraph
+from nevec.ir.live import Liveness
+from nevec.ir.remat import Remat
+from nevec.ir.reg import Allocation, InterferenceGraph, LinearScan, copies_in
+from nevec.ir.spill import RegisterFileTooSmall, Spills
+from nevec.ir.stats import RegallocDump, RegallocStats
+from nevec.ir.ir import Tac
+from nevec.ir.sym import Sym
 from nevec.compile.compile import Compile
 from nevec.opt.opt import Opt
 
 def read_options(args: List[str]) -> List[str]:
     return list(filter(lambda a: a.startswith("-"), args))
 
+def option_value(options: List[str], name: str) -> Optional[str]:
+    prefix = name + "="
+
+    return next(
+        (o.removeprefix(prefix) for o in options if o.startswith(prefix)),
+        None
+    )
+
+def read_max_errors(options: List[str]) -> Optional[int]:
+    value = option_value(options, "--max-errors")
+
+    if value is None:
+        return Report.MAX_ERRORS
+
+    # just like gcc, --max-errors=0 means there's no limit at all
+    max_errors = int(value)
+
+    return max_errors if max_errors > 0 else None
+
+def read_regalloc(options: List[str]) -> str:
+    regalloc = option_value(options, "--regalloc") or "graph"
+
+    if regalloc not in ("linear", "graph"):
+        print(
+            f"unknown register allocator: {regalloc}; "
+            "expected --regalloc=linear or --regalloc=graph",
+            file=sys.stderr
+        )
+
+        exit(1)
+
+    return regalloc
+
+def read_regalloc_order(options: List[str]) -> str:
+    order = option_value(options, "--regalloc-order") or "creation"
+
+    if order not in InterferenceGraph.ORDERS:
+        print(
+            f"unknown colouring order: {order}; expected "
+            + " or ".join(
+                f"--regalloc-order={o}"
+                for o in InterferenceGraph.ORDERS
+            ),
+            file=sys.stderr
+        )
+
+        exit(1)
+
+    return order
+
+def read_regalloc_dump(options: List[str]) -> Optional[str]:
+    path = option_value(options, "--regalloc-dump")
+
+    if path is None:
+        return None
+
+    if not path.endswith(RegallocDump.FORMATS):
+        print(
+            f"can't tell what to write to {path}; "
+            "--regalloc-dump takes a .dot or a .json file",
+            file=sys.stderr
+        )
+
+        exit(1)
+
+    return path
+
+def read_max_regs(options: List[str]) -> int:
+    value = option_value(options, "--max-regs")
+
+    if value is None:
+        return Spills.MAX_REGS
+
+    max_regs = int(value)
+
+    # registers are encoded in a single byte, and spilling anything at all
+    # takes a few of them as scratch registers
+    if not Spills.MIN_REGS <= max_regs <= Spills.MAX_REGS:
+        print(
+            f"--max-regs must be between {Spills.MIN_REGS} and "
+            f"{Spills.MAX_REGS}",
+            file=sys.stderr
+        )
+
+        exit(1)
+
+    return max_regs
+
+def choose_spills(syms: List[Sym], ir: List[Tac], max_regs: int) -> Spills:
+    try:
+        return Spills(syms, ir, max_regs)
+    except RegisterFileTooSmall as e:
+        print(f"{e}; try a bigger --max-regs", file=sys.stderr)
+
+        exit(1)
+
+def allocate(
+    syms: List[Sym],
+    ir: List[Tac],
+    regalloc: str,
+    order: str,
+    reg_count: int
+) -> Allocation:
+    # spilled symbols have no register to share.  the front end only builds
+    # straight-line IR for now, so this is empty until IR gets laid out from
+    # a `Cfg`--see `copies_in`
+    kept = set(s.id for s in syms)
+
+    copies = [
+        (a, b)
+        for a, b in copies_in(ir)
+        if a.id in kept and b.id in kept
+    ]
+
+    if regalloc == "linear":
+        return LinearScan(syms, copies=copies)
+
+    return InterferenceGraph(
+        syms,
+        debug=False,
+        copies=copies,
+        order=order,
+        reg_count=reg_count
+    )
+
+def fail(result: CheckResult):
+    if result.was_capped:
+        print(
+            f"stopped after {len(result.diagnostics)} errors; "
+            "use --max-errors=0 to see all of them",
+            file=sys.stderr
+        )
+
+    exit(1)
+
 if __name__ == "__main__":
     args = sys.argv
 
@@ -25,21 +170,50 @@ if __name__ == "__main__":
     options = read_options(args)
 
     do_opt = "--no-opt" not in options
+    do_remat = "--no-remat" not in options
+    verify_ir = "--verify-ir" in options
+    max_errors = read_max_errors(options)
+    regalloc = read_regalloc(options)
+    regalloc_order = read_regalloc_order(options)
+    max_regs = read_max_regs(options)
+    regalloc_stats = "--regalloc-stats" in options
+    pass_stats = "--pass-stats" in options
+    regalloc_dump = read_regalloc_dump(options)
+
+    cache = CheckCache() if "--no-cache" not in options else None
 
     with open(filename) as f:
         code = f.read()
-        parse = Parse(code)
+        ctx = CompilationContext(code, filename, max_errors)
+
+        cached = cache.load(ctx) if cache is not None else None
+
+        # a file we already know to be broken doesn't even need parsing
+        if cached is not None and cached.had_err:
+            cached.replay()
+            fail(cached)
+
+        parse = Parse(code, ctx)
 
         ast = parse.parse()
 
-        print(ast)
+        result = cached
 
-        had_err = TypeCheck().visit(ast)
+        if result is None:
+            had_err = TypeCheck(ctx).visit(ast)
+            result = CheckResult.of(ctx, had_err)
 
-        if had_err:
-            exit(1)
+            if cache is not None:
+                cache.store(ctx, result)
 
-        toir = ToIr()
+        if result.had_err:
+            fail(result)
+
+        # only once it checks, so that a run that hits the cache for a broken
+        # file prints the same as the one that filled it
+        print(ast)
+
+        toir = ToIr(ctx)
 
         syms = toir.syms
 
@@ -48,18 +222,53 @@ if __name__ == "__main__":
         print("unoptimized:")
         print("\n".join(map(str, ir)))
 
-        opt_ir = Opt(syms, do_opt).optimize(ir)
+        opt = Opt(syms, do_opt, debug=verify_ir)
+
+        ir = opt.optimize(ir)
+        syms.renumber()
+
         print("optimized:")
-        print("\n".join(map(str, opt_ir)))
+        print("\n".join(map(str, ir)))
+
+        if pass_stats:
+            print(opt.report())
+
+        if do_remat:
+            ir = Remat(syms).rematerialize(ir)
+
+        Liveness.of(ir).apply(syms, ir)
+
+        # choosing what to spill is as much a part of allocating as colouring
+        start = time.perf_counter()
+
+        spills = choose_spills(syms.values(), ir, max_regs)
+
+        graph = allocate(
+            spills.kept,
+            ir,
+            regalloc,
+            regalloc_order,
+            spills.available()
+        )
+
+        elapsed = time.perf_counter() - start
+
+        if len(spills) > 0:
+            print(
+                f"peak register pressure of {spills.peak} is over "
+                f"{max_regs} registers; spilled {len(spills)} symbols"
+            )
 
-        ir = opt_ir
+        if regalloc_stats:
+            print(RegallocStats(syms.values(), graph, spills, elapsed))
 
-        graph = InterferenceGraph(syms.values(), debug=False)
+        if regalloc_dump is not None:
+            RegallocDump(syms.values(), graph, spills).write(regalloc_dump)
 
     output_file = filename.removesuffix(".neve") + ".geada"
 
     with open(output_file, "wb") as f:
-        compile = Compile(graph)
+        compile = Compile(graph, ctx, spills)
         compile.compile(ir)
     
         bytecode = compile.output(to=f)
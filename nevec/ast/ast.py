@@ -175,13 +175,17 @@ class Concat(BinOp):
     def infer_type(self, base_type=None):
         _ = base_type
 
-        if self.left.type != self.right.type:
+        return Concat.type_of(self.left.type, self.right.type)
+
+    @staticmethod
+    def type_of(left: Type, right: Type) -> Type:
+        if left != right:
             return Types.UNKNOWN
 
-        if not self.left.type.is_str():
+        if not left.is_str():
             return Types.UNKNOWN
 
-        return self.left.type.unless_unknown(self.left.type, self.right.type)
+        return left.unless_unknown(left, right)
 
 
 class Show(Expr):
@@ -224,30 +228,37 @@ class Table(Expr):
 
         return val == first_val
 
+    @staticmethod
+    def first_mismatch(exprs: List[Expr]) -> Optional[int]:
+        first = exprs[0].type
+
+        # a single pass over the entries: table literals in data-heavy
+        # sources can easily have tens of thousands of them
+        return next(
+            (i for i, e in enumerate(exprs) if e.type != first),
+            None
+        )
+
     def infer_type(self) -> TableType:
         type = TableType(Types.UNKNOWN, Types.UNKNOWN)
 
+        self.key_mismatch: Optional[int] = None
+        self.val_mismatch: Optional[int] = None
+
         if (
             len(self.keys) != len(self.vals) or
             self.keys == []
         ):
             return type
 
-        first_key = self.keys[0]
-        remaining_keys = self.keys[1:]
+        self.key_mismatch = Table.first_mismatch(self.keys)
+        self.val_mismatch = Table.first_mismatch(self.vals)
 
-        if list(
-            filter(lambda k: k.type != first_key.type, remaining_keys)
-        ) == []:
-            type.key = first_key.type
+        if self.key_mismatch is None:
+            type.key = self.keys[0].type
 
-        first_val = self.vals[0]
-        remaining_vals = self.vals[1:]
-
-        if list(
-            filter(lambda v: v.type != first_val.type, remaining_vals)
-        ) == []:
-            type.val = first_val.type
+        if self.val_mismatch is None:
+            type.val = self.vals[0].type
 
         return type
 
@@ -256,16 +267,7 @@ class Table(Expr):
         keys: List[Expr],
         vals: List[Expr]
     ) -> List[str]:
-        if keys == []:
-            return []
-
-        key = keys[0]
-        val = vals[0]
-
-        return [f"{key}: {val}"] + self.repr_keys_and_vals(
-            keys[1:],
-            vals[1:]
-        )
+        return [f"{key}: {val}" for key, val in zip(keys, vals)]
 
     def __repr__(self) -> str:
         if self.keys == []:
@@ -340,15 +342,17 @@ class Str(Expr):
 
         return value[begin:end]
     
-    def infer_type(self) -> Type:
+    @staticmethod
+    def type_of(value: str) -> Type:
         return (
             Types.STR
-            if not self.is_unicode()
+            if not Str.is_unicode_str(value)
             else Types.STR8
         )
 
-    def is_unicode(self) -> bool:
-        encoded = self.value.encode("utf8")
+    @staticmethod
+    def is_unicode_str(value: str) -> bool:
+        encoded = value.encode("utf8")
         
         try:
             _ = encoded.decode("ascii")
@@ -356,6 +360,12 @@ class Str(Expr):
         except UnicodeDecodeError:
             return True
 
+    def infer_type(self) -> Type:
+        return Str.type_of(self.value)
+
+    def is_unicode(self) -> bool:
+        return Str.is_unicode_str(self.value)
+
     def __repr__(self):
         return f"\"{self.value}\""
 
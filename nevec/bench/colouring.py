@@ -0,0 +1,91 @@
+import sys
+
+from pathlib import Path
+from typing import List, Optional
+
+from nevec.check.type import TypeCheck
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.reg import InterferenceGraph, LinearScan
+from nevec.ir.spill import Spills
+from nevec.ir.sym import Sym
+from nevec.ir.toir import ToIr
+from nevec.opt.opt import Opt
+from nevec.parse.parse import Parse
+
+# compiles every test program it can and reports how many registers each
+# colouring order ends up using, next to the most symbols ever alive at
+# once--no order can do better than that.  programs that don't compile are
+# skipped, and their errors still go to stderr, so
+#
+#   python -m nevec.bench.colouring test 2> /dev/null
+#
+# keeps the table readable.  constant folding leaves most of these programs
+# with a single symbol, so they're allocated unoptimized.
+
+def front_end(path: Path) -> Optional[List[Sym]]:
+    code = path.read_text()
+    ctx = CompilationContext(code, str(path))
+
+    ast = Parse(code, ctx).parse()
+
+    if ctx.had_err() or TypeCheck(ctx).visit(ast):
+        return None
+
+    toir = ToIr(ctx)
+    ir = toir.build_ir(ast)
+
+    Opt(toir.syms, do_opt=False).optimize(ir)
+    toir.syms.renumber()
+
+    return toir.syms.values()
+
+def reg_count(syms: List[Sym], order: str) -> int:
+    graph = InterferenceGraph(syms, order=order)
+
+    return 1 + max((graph.get_reg(s) for s in syms), default=-1)
+
+def row(*cells, width: int=16) -> str:
+    first, *rest = map(str, cells)
+
+    return f"{first:<{width}}" + "".join(f"{c:>14}" for c in rest)
+
+if __name__ == "__main__":
+    root = Path(sys.argv[1] if len(sys.argv) > 1 else "test")
+    paths = sorted(root.glob("**/*.neve"))
+
+    width = max((len(str(p.relative_to(root))) for p in paths), default=0) + 2
+
+    orders = InterferenceGraph.ORDERS
+
+    print(row("program", "symbols", "peak", "linear", *orders, width=width))
+
+    totals = [0] * (len(orders) + 2)
+    skipped = 0
+
+    for path in paths:
+        # plenty of the test programs use features the compiler doesn't
+        # have yet, or trip over its bugs
+        try:
+            syms = front_end(path)
+        except Exception:
+            syms = None
+
+        if syms is None:
+            skipped += 1
+            continue
+
+        counts = [
+            Spills.pressure(syms),
+            LinearScan(syms).reg_count,
+            *(reg_count(syms, o) for o in orders)
+        ]
+
+        totals = [t + c for t, c in zip(totals, counts)]
+
+        name = path.relative_to(root)
+        print(row(name, len(syms), *counts, width=width))
+
+    print(row("total", "", *totals, width=width))
+
+    if skipped > 0:
+        print(f"skipped {skipped} programs that don't compile yet")
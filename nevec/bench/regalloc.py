@@ -0,0 +1,66 @@
+import sys
+import time
+
+from typing import Callable, List, Tuple
+
+from nevec.check.type import TypeCheck
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.reg import Allocation, InterferenceGraph, LinearScan
+from nevec.ir.sym import Sym
+from nevec.ir.toir import ToIr
+from nevec.opt.opt import Opt
+from nevec.parse.parse import Parse
+
+# compiles a table literal with `size` non-constant entries--all of its keys
+# and values are live at once, which is the worst case for register
+# allocation--and times each allocator on it.
+
+def make_source(size: int) -> str:
+    entries = ", ".join(f"{i}: {i} + 1" for i in range(size))
+
+    return f"[{entries}]"
+
+def front_end(code: str) -> List[Sym]:
+    ctx = CompilationContext(code, "bench.neve")
+
+    ast = Parse(code, ctx).parse()
+    TypeCheck(ctx).visit(ast)
+
+    toir = ToIr(ctx)
+    ir = toir.build_ir(ast)
+
+    Opt(toir.syms, do_opt=False).optimize(ir)
+
+    return toir.syms.values()
+
+def reg_count(allocation: Allocation, syms: List[Sym]) -> int:
+    return 1 + max((allocation.get_reg(s) for s in syms), default=-1)
+
+def time_allocator(
+    allocate: Callable[[List[Sym]], Allocation],
+    syms: List[Sym]
+) -> Tuple[float, int]:
+    start = time.perf_counter()
+    allocation = allocate(syms)
+
+    return time.perf_counter() - start, reg_count(allocation, syms)
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    start = time.perf_counter()
+    syms = front_end(make_source(size))
+    front = time.perf_counter() - start
+
+    print(f"table of {size} entries, {len(syms)} symbols")
+    print(f"  front end:  {front * 1000:.1f}ms")
+
+    allocators = {
+        "linear": LinearScan,
+        "graph": InterferenceGraph
+    }
+
+    for name, allocate in allocators.items():
+        elapsed, regs = time_allocator(allocate, syms)
+
+        print(f"  {name + ':':<11} {elapsed * 1000:.1f}ms, {regs} registers")
@@ -0,0 +1,63 @@
+import sys
+import time
+
+from typing import List, Optional
+
+from nevec.err.err import Err, Line, Note, RenderCache
+from nevec.lex.tok import Loc
+
+# renders many errors that all point at the same few lines, which is what
+# error storms in generated files look like, with and without a shared
+# render cache.
+
+def make_source(width: int, lines: int) -> str:
+    line = " + ".join(["1"] * (width // 4))
+
+    return "\n".join([line] * lines)
+
+def make_err(
+    lines: List[str],
+    i: int,
+    cache: Optional[RenderCache]
+) -> Err:
+    on_line = i % len(lines) + 1
+    col = 1 + (i % 4) * 4
+
+    loc = Loc(col, on_line, 1)
+    other = Loc(col + 4, on_line, 1)
+
+    return Err(
+        "bench.neve",
+        lines,
+        "mismatched types: Int, Float",
+        loc,
+        cache
+    ).show(
+        Line(loc).add(
+            Note.err(loc, "Int")
+        ).add(
+            Note.harmless(other, "Float")
+        )
+    )
+
+def render(count: int, lines: List[str], shared: bool) -> float:
+    cache = RenderCache() if shared else None
+
+    start = time.perf_counter()
+
+    for i in range(count):
+        make_err(lines, i, cache).emit()
+
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    lines = make_source(width=400, lines=4).split("\n")
+
+    uncached = render(count, lines, shared=False)
+    cached = render(count, lines, shared=True)
+
+    print(f"{count} errors on {len(lines)} lines of {len(lines[0])} columns")
+    print(f"  no cache:     {uncached * 1000:.1f}ms")
+    print(f"  shared cache: {cached * 1000:.1f}ms")
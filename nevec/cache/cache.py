@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+
+from dataclasses import asdict
+from functools import cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from nevec.ctx.ctx import CompilationContext
+from nevec.err.report import Diagnostic
+
+@cache
+def compiler_version() -> str:
+    # any change to the compiler itself has to invalidate the cache, so
+    # the "version" is simply a fingerprint of nevec's own sources
+    root = Path(__file__).resolve().parent.parent
+    digest = hashlib.sha256()
+
+    for path in sorted(root.rglob("*.py")):
+        digest.update(str(path.relative_to(root)).encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+class CheckResult:
+    def __init__(
+        self,
+        had_err: bool,
+        diagnostics: List[Diagnostic],
+        was_capped: bool=False
+    ):
+        self.had_err: bool = had_err
+        self.diagnostics: List[Diagnostic] = diagnostics
+        self.was_capped: bool = was_capped
+
+    @staticmethod
+    def of(ctx: CompilationContext, had_err: bool) -> "CheckResult":
+        report = ctx.report
+
+        return CheckResult(
+            had_err,
+            list(report.diagnostics),
+            report.is_full()
+        )
+
+    @staticmethod
+    def from_json(data: Dict[str, Any]) -> "CheckResult":
+        return CheckResult(
+            data["had_err"],
+            [Diagnostic(**d) for d in data["diagnostics"]],
+            data["was_capped"]
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "had_err": self.had_err,
+            "diagnostics": [asdict(d) for d in self.diagnostics],
+            "was_capped": self.was_capped
+        }
+
+    def replay(self):
+        for diagnostic in self.diagnostics:
+            diagnostic.print()
+
+
+class CheckCache:
+    MAX_SIZE = 32 * 1024 * 1024
+
+    def __init__(self, dir: Optional[str]=None, max_size: int=MAX_SIZE):
+        self.dir: Path = Path(
+            dir
+            if dir is not None
+            else CheckCache.default_dir()
+        )
+
+        self.max_size: int = max_size
+
+    @staticmethod
+    def default_dir() -> str:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+
+        return os.path.join(base, "nevec", "check")
+
+    def key_of(self, ctx: CompilationContext) -> str:
+        digest = hashlib.sha256()
+
+        # the file name and the error cap are part of the rendered output,
+        # so they have to be part of the key as well
+        digest.update(compiler_version().encode())
+        digest.update(ctx.abs_file_path.encode())
+        digest.update(str(ctx.report.max_errors).encode())
+        digest.update(ctx.code.encode())
+
+        return digest.hexdigest()
+
+    def path_of(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def load(self, ctx: CompilationContext) -> Optional[CheckResult]:
+        path = self.path_of(self.key_of(ctx))
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+
+            # refreshing the modification time is what makes eviction LRU
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            return CheckResult.from_json(data)
+        except (KeyError, TypeError):
+            return None
+
+    def store(self, ctx: CompilationContext, result: CheckResult):
+        path = self.path_of(self.key_of(ctx))
+        tmp_path = path.with_suffix(
+            f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+
+            with open(tmp_path, "w") as f:
+                json.dump(result.to_json(), f)
+
+            # atomic, so that concurrent compilations never see half an entry
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        self.evict()
+
+    def evict(self):
+        try:
+            entries = [
+                (p.stat(), p)
+                for p in self.dir.glob("*.json")
+            ]
+        except OSError:
+            return
+
+        total = sum(stat.st_size for stat, _ in entries)
+
+        if total <= self.max_size:
+            return
+
+        entries.sort(key=lambda e: e[0].st_mtime)
+
+        for stat, path in entries:
+            if total <= self.max_size:
+                break
+
+            try:
+                path.unlink()
+            except OSError:
+                continue
+
+            total -= stat.st_size
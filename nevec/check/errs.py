@@ -8,9 +8,11 @@ from nevec.err.report import Report
 from nevec.lex.tok import Loc
 
 class TypeErr(Err):
-    def __init__(self, msg: str, locus: Loc, *exprs: Expr):
+    def __init__(self, report: Report, msg: str, locus: Loc, *exprs: Expr):
+        self.report: Report = report
         self.msg: str = msg
         self.locus: Loc = locus
+        self.loc: Loc = locus
         self.exprs: List[Expr] = list(exprs)
 
         if self.exprs == []:
@@ -70,7 +72,7 @@ class TypeErr(Err):
 
         lines = sorted(lines, key=lambda l: l.loc.line)
 
-        err = Report.err(
+        err = self.report.err(
             self.msg,
             self.locus
         )
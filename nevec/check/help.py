@@ -13,10 +13,12 @@ from nevec.err.report import Report
 class Assume:
     def __init__(
         self,
+        report: Report,
         node: Expr, 
         that: Type | Callable[[Type], bool],
         is_complete: bool=True
     ):
+        self.report: Report = report
         self.node: Expr = node
 
         self.complete_with(that)
@@ -27,16 +29,21 @@ class Assume:
         self.types_in_question: List[Type] = [node.type]
 
     @staticmethod
-    def same_type(a: Expr, b: Expr) -> "Assume":
-        return Assume(a, lambda t: t == b.type).with_nodes(b)
+    def same_type(report: Report, a: Expr, b: Expr) -> "Assume":
+        return Assume(report, a, lambda t: t == b.type).with_nodes(b)
 
     @staticmethod
-    def both(a: Expr, b: Expr) -> "Assume":
-        return Assume(a, lambda t: t == b.type, is_complete=False).with_nodes(b)
+    def both(report: Report, a: Expr, b: Expr) -> "Assume":
+        return Assume(
+            report,
+            a,
+            lambda t: t == b.type,
+            is_complete=False
+        ).with_nodes(b)
 
     @staticmethod
-    def that(what: bool) -> "Assume":
-        return Assume(Expr.empty(), lambda _: what).without()
+    def that(report: Report, what: bool) -> "Assume":
+        return Assume(report, Expr.empty(), lambda _: what).without()
 
     def complete_with(self, what: Type | Callable[[Type], bool]):
         self.what = self.make_what(what)
@@ -85,7 +92,7 @@ class Assume:
         if self.what(self.node.type):
             return False
 
-        err.print()
+        self.report.show(err)
         return True
 
     def or_fail(
@@ -97,6 +104,11 @@ class Assume:
         if self.what(self.node.type):
             return False
 
+        # no need to build an error that's never going to be shown
+        if self.report.is_full():
+            self.report.suppress()
+            return True
+
         first_node = self.nodes_in_question[0]
 
         at = at if at is not None else first_node.loc
@@ -116,6 +128,7 @@ class Assume:
 
         return self.otherwise(
             TypeErr(
+                self.report,
                 saying,
                 at,
                 *self.nodes_in_question
@@ -125,6 +138,7 @@ class Assume:
     def or_show(self, msg: str, parent: Ast, *culprits: Expr) -> bool:
         return self.otherwise(
             TypeErr(
+                self.report,
                 msg,
                 parent.loc,
                 *culprits
@@ -156,15 +170,15 @@ class Suggest:
         )
 
     @staticmethod
-    def method_call_for(what: Expr, suffix: str) -> str:
+    def method_call_for(report: Report, what: Expr, suffix: str) -> str:
         if Suggest.should_insert_for(what):
             return suffix
 
-        return f"({Report.lexeme_of(what.loc)})" + suffix
+        return f"({report.lexeme_of(what.loc)})" + suffix
 
     @staticmethod
-    def conversion_for(what: Expr, to: Type) -> Suggestion:
-        fix = Suggest.method_call_for(what, ".somemethod")
+    def conversion_for(report: Report, what: Expr, to: Type) -> Suggestion:
+        fix = Suggest.method_call_for(report, what, ".somemethod")
 
         return Suggestion(
             f"you can convert {what.type} to {to}",
@@ -175,10 +189,14 @@ class Suggest:
         )
 
     @staticmethod
-    def possible_conversions(to: Type, *nodes: Expr) -> List[Suggestion]:
+    def possible_conversions(
+        report: Report,
+        to: Type,
+        *nodes: Expr
+    ) -> List[Suggestion]:
         may_be_converted = [n for n in nodes if n.type != to]
         
         return list(map(
-            lambda n: Suggest.conversion_for(n, to),
+            lambda n: Suggest.conversion_for(report, n, to),
             may_be_converted
         ))
@@ -1,3 +1,5 @@
+from typing import Any, Iterable
+
 from nevec.ast.ast import *
 from nevec.ast.visit import Visit
 
@@ -5,8 +7,22 @@ from nevec.check.errs import *
 from nevec.check.help import *
 
 from nevec.err.err import Err
+from nevec.err.report import Report
+from nevec.ctx.ctx import CompilationContext
 
 class TypeCheck(Visit[Ast, bool]):
+    def __init__(self, ctx: CompilationContext):
+        self.ctx: CompilationContext = ctx
+        self.report: Report = ctx.report
+
+    def visit(self, node: Ast, *extra_data: Any) -> bool:
+        # once the report has given up, checking any further would only
+        # produce errors nobody gets to see
+        if self.report.is_full():
+            return self.err()
+
+        return super().visit(node, *extra_data)
+
     def err(self) -> bool:
         return True
 
@@ -14,18 +30,26 @@ class TypeCheck(Visit[Ast, bool]):
         return False
 
     def any_fail(self, parent: Ast, *what: Ast) -> bool:
-        if (
-            list(
-                filter(lambda w: self.visit(w) or w.type.is_ignorable(), what)
-            ) != [] or parent.type.is_ignorable()
-        ):
+        return self.any_fail_in(parent, what)
+
+    def any_fail_in(self, parent: Ast, *groups: Iterable[Ast]) -> bool:
+        failed = False
+
+        # every child is visited, even after one of them failed, so that
+        # all of their errors get reported
+        for group in groups:
+            for w in group:
+                if self.visit(w) or w.type.is_ignorable():
+                    failed = True
+
+        if failed or parent.type.is_ignorable():
             parent.type.poison()
             return self.err()
 
         return self.okay()
 
     def fail(self, err: Err) -> bool:
-        err.print()
+        self.report.show(err)
         return self.err()
 
     def visit_Program(self, program: Program) -> bool:
@@ -41,12 +65,12 @@ class TypeCheck(Visit[Ast, bool]):
             return self.err()
 
         if un_op.op == UnOp.Op.NEG:
-            return Assume(un_op, that=Type.is_num).or_fail(
+            return Assume(self.report, un_op, that=Type.is_num).or_fail(
                 saying="can only negate Float or Int values"
             )
             
         if un_op.op == UnOp.Op.NOT:
-            return Assume(un_op, Types.BOOL).or_fail(
+            return Assume(self.report, un_op, Types.BOOL).or_fail(
                 saying="can only flip booleans"
             )
 
@@ -62,11 +86,16 @@ class TypeCheck(Visit[Ast, bool]):
             return self.err()
 
         if bitwise.type.is_invalid(): 
-            Assume.same_type(left, right).or_fail()
+            Assume.same_type(self.report, left, right).or_fail()
             
-            Assume.both(left, right).are(Types.INT).or_fail(
+            Assume.both(self.report, left, right).are(Types.INT).or_fail(
                 Inform.at(bitwise.tok.loc, "only accepts Int"),
-                *Suggest.possible_conversions(Types.INT, left, right),
+                *Suggest.possible_conversions(
+                    self.report,
+                    Types.INT,
+                    left,
+                    right
+                ),
                 saying="operands of bitwise operation must be Int"
             )
 
@@ -81,7 +110,7 @@ class TypeCheck(Visit[Ast, bool]):
         if self.any_fail(comparison, left, right):
             return self.err()
 
-        return Assume(comparison, that=Type.is_valid).or_fail()
+        return Assume(self.report, comparison, that=Type.is_valid).or_fail()
 
     def visit_Arith(self, arith: Arith):
         left = arith.left
@@ -93,15 +122,20 @@ class TypeCheck(Visit[Ast, bool]):
         if arith.type.is_valid():
             return self.okay()
 
-        Assume.same_type(left, right).or_fail(
-            *Suggest.possible_conversions(Types.INT, left, right)
+        Assume.same_type(self.report, left, right).or_fail(
+            *Suggest.possible_conversions(self.report, Types.INT, left, right)
         )
 
         op = arith.tok
 
-        Assume.both(left, right).are(Type.is_num).or_fail(
+        Assume.both(self.report, left, right).are(Type.is_num).or_fail(
             Inform.at(op.loc, that="only accepts matching Int or Float"),
-            *Suggest.possible_conversions(Types.INT, left, right),
+            *Suggest.possible_conversions(
+                self.report,
+                Types.INT,
+                left,
+                right
+            ),
             saying=(
                 "operands of arithmetic operation must be "
                 "either Int or Float"
@@ -124,12 +158,12 @@ class TypeCheck(Visit[Ast, bool]):
         # Concat node, it must find a Str node on the left hand side
         culprit = right
 
-        Assume(culprit, that=Type.is_str).or_fail(
-            Suggest.conversion_for(culprit, to=Types.STR)
+        Assume(self.report, culprit, that=Type.is_str).or_fail(
+            Suggest.conversion_for(self.report, culprit, to=Types.STR)
         )
 
-        Assume.same_type(culprit, left).or_fail(
-            Suggest.conversion_for(culprit, to=left.type)
+        Assume.same_type(self.report, culprit, left).or_fail(
+            Suggest.conversion_for(self.report, culprit, to=left.type)
         )
 
         return self.err()
@@ -138,7 +172,7 @@ class TypeCheck(Visit[Ast, bool]):
         keys = table.keys
         vals = table.vals
 
-        if self.any_fail(table, *keys, *vals):
+        if self.any_fail_in(table, keys, vals):
             return self.err()
 
         if table.type.is_valid():
@@ -146,20 +180,30 @@ class TypeCheck(Visit[Ast, bool]):
 
         if table.keys == []:
             return self.fail(TypeErr(
+                self.report,
                 "could not infer table's type",
                 table.loc,
                 table
             ))
 
-        not_ok_keys = list(filter(
-            lambda k: not table.matches_first_key(k.type),
-            table.keys
-        ))
+        # anything before the first mismatch is known to be fine already
+        not_ok_keys = (
+            [
+                k for k in keys[table.key_mismatch:]
+                if not table.matches_first_key(k.type)
+            ]
+            if table.key_mismatch is not None
+            else []
+        )
 
-        not_ok_vals = list(filter(
-            lambda v: not table.matches_first_val(v.type),
-            table.vals
-        ))
+        not_ok_vals = (
+            [
+                v for v in vals[table.val_mismatch:]
+                if not table.matches_first_val(v.type)
+            ]
+            if table.val_mismatch is not None
+            else []
+        )
 
         first_key = table.keys[0]
         first_val = table.vals[0]
@@ -167,13 +211,19 @@ class TypeCheck(Visit[Ast, bool]):
         key_type = table.type.key
         val_type = table.type.val
 
-        Assume.that(key_type.is_valid()).with_nodes(*not_ok_keys).with_types(
+        Assume.that(
+            self.report,
+            key_type.is_valid()
+        ).with_nodes(*not_ok_keys).with_types(
             first_key.type
         ).or_fail(
             Inform.type_of(first_key, saying="first key")  
         )
 
-        Assume.that(val_type.is_valid()).with_nodes(*not_ok_vals).with_types(
+        Assume.that(
+            self.report,
+            val_type.is_valid()
+        ).with_nodes(*not_ok_vals).with_types(
             first_val.type
         ).or_fail(
             Inform.type_of(first_val, saying="first val")
@@ -1,4 +1,4 @@
-from typing import BinaryIO, List, Any, Dict
+from typing import BinaryIO, List, Any, Dict, Hashable
 
 from nevec.compile.peephole import Peephole
 from nevec.ast.visit import Visit
@@ -9,16 +9,29 @@ from nevec.opcode.emit import Emit
 
 from nevec.ir.ir import *
 from nevec.ir.reg import *
+from nevec.ir.spill import Spills
 
-from nevec.err.report import Report
+from nevec.ctx.ctx import CompilationContext
 
 class Compile(Visit[Ir, None]):
     NEVE_MAGIC_NUMBER = 0xbadbed00
     NEVE_HEADER_SEPARATOR = 0x1c
     NEVE_EOF_PADDING_BYTE = 0xff
 
-    def __init__(self, graph: InterferenceGraph):
-        self.graph: InterferenceGraph = graph
+    def __init__(
+        self,
+        graph: Allocation,
+        ctx: CompilationContext,
+        spills: Optional[Spills]=None
+    ):
+        self.graph: Allocation = graph
+        self.ctx: CompilationContext = ctx
+
+        self.spills: Optional[Spills] = spills
+
+        # the scratch register each spilled operand of the instruction
+        # being compiled was reloaded into, keyed by symbol id
+        self.reloaded: Dict[int, int] = {}
 
         self.const_header_bytes: List[bytes] = []
         self.debug_header_bytes: List[bytes] = []
@@ -32,6 +45,7 @@ class Compile(Visit[Ir, None]):
 
         self.consts: List[Const] = []
         self.const_indices: Dict[int, int] = {}
+        self.const_keys: Dict[Hashable, Const] = {}
 
         self.emit_first_bytes()
     
@@ -65,19 +79,65 @@ class Compile(Visit[Ir, None]):
         ]
 
     def emit_first_bytes(self):
-        source_file_path = Report.abs_file_path
+        source_file_path = self.ctx.abs_file_path
 
         self.emit_debug(Emit.encode_int(len(source_file_path), 2))
         self.emit_debug(source_file_path.encode())
 
     def reg_of(self, sym: Sym) -> int:
-        return self.graph.get_reg(sym)
+        reg = self.reloaded.get(sym.id)
+
+        if reg is not None:
+            return reg
+
+        # a result that gets spilled is written to the first scratch
+        # register, and stored from there
+        if self.spills is not None and self.spills.is_spilled(sym):
+            return self.spills.scratch_reg(0)
+
+        reg = self.graph.get_reg(sym)
+
+        # anything up there would get clobbered by the next reload
+        if self.spills is not None and reg >= self.spills.available():
+            raise ValueError(
+                f"{sym} was given r{reg}, which is a scratch register"
+            )
+
+        return reg
+
+    def reload(self, used: List[Sym], line: int):
+        self.reloaded = {}
+
+        if self.spills is None:
+            return
+
+        for sym in used:
+            if not self.spills.is_spilled(sym) or sym.id in self.reloaded:
+                continue
+
+            reg = self.spills.scratch_reg(len(self.reloaded))
+            self.reloaded[sym.id] = reg
+
+            self.emit(Instr(Opcode.RELOAD, reg, *self.slot(sym)), line)
+
+    def spill(self, sym: Sym, line: int):
+        if self.spills is None or not self.spills.is_spilled(sym):
+            return
+
+        reg = self.spills.scratch_reg(0)
+
+        self.emit(Instr(Opcode.SPILL, reg, *self.slot(sym)), line)
+
+    def slot(self, sym: Sym) -> List[int]:
+        assert self.spills is not None
+
+        # slots take two bytes, little-endian like everything else
+        slot = self.spills.slot_of(sym)
+
+        return [slot & 0xff, slot >> 8]
 
     def get_const(self, const: Const) -> Optional[Const]:
-        return next(
-            (c for c in self.consts if c == const),
-            None
-        )
+        return self.const_keys.get(const.key())
 
     def make_const[T](self, const_type: type[Const], value: T) -> Const:
         next_id = len(self.consts)
@@ -89,6 +149,7 @@ class Compile(Visit[Ir, None]):
             return existing_const
 
         self.consts.append(const)
+        self.const_keys[const.key()] = const
 
         self.const_indices[const.id] = next_id
          
@@ -134,21 +195,24 @@ class Compile(Visit[Ir, None]):
         self.emit(Instr(Opcode.PUSH, reg, const_index), line)
     
     def compile(self, ir: List[Tac]):
-        if ir == []:
-            return 
-
-        head = ir[0]
-
-        self.visit(head) 
-
-        self.compile(ir[1:])
+        for tac in ir:
+            self.visit(tac)
 
     def visit_Tac(self, tac: Tac):
         sym  = tac.sym
-        dest_reg = self.graph.get_reg(sym)
+        line = tac.loc.line
+
+        self.reload(tac.used_syms(), line)
+
+        dest_reg = self.reg_of(sym)
 
         self.visit(tac.expr, dest_reg)
 
+        if tac.defines():
+            self.spill(sym, line)
+
+        self.reloaded = {}
+
     def visit_IRet(self, ret: IRet, dest_reg: int):
         self.emit(Instr(Opcode.RET, dest_reg), ret.loc.line)
 
@@ -186,6 +250,45 @@ class Compile(Visit[Ir, None]):
 
         self.emit(instr, concat.loc.line)
 
+    def visit_IConcatN(self, concat: IConcatN, dest_reg: int):
+        parts = [self.reg_of(p.sym) for p in concat.parts]
+
+        instr = Instr(
+            concat.op(),
+
+            dest_reg,
+            len(parts),
+            *parts
+        )
+
+        self.emit(instr, concat.loc.line)
+
+    def visit_IParam(self, param: IParam, dest_reg: int):
+        # the caller's window already put the argument in this register
+        if param.index != dest_reg:
+            raise ValueError(
+                f"parameter {param.index} was given r{dest_reg}; only the "
+                "graph allocator pins parameters to their registers"
+            )
+
+    def visit_ICall(self, call: ICall, dest_reg: int):
+        if call.base < 0:
+            raise ValueError(
+                f"no register window was placed for `{call}`; only the "
+                "graph allocator places them"
+            )
+
+        instr = Instr(
+            Opcode.CALL,
+
+            dest_reg,
+            call.index,
+            call.base,
+            len(call.args)
+        )
+
+        self.emit(instr, call.loc.line)
+
     def visit_TableSet(self, table_set: TableSet, dest_reg: int):
         table = self.reg_of(table_set.table.sym)
         val = self.reg_of(table_set.expr.sym)
@@ -0,0 +1,25 @@
+import os
+
+from typing import List, Optional
+
+from nevec.err.report import Report
+
+class CompilationContext:
+    def __init__(
+        self,
+        code: str,
+        file_name: str="test.neve",
+        max_errors: Optional[int]=Report.MAX_ERRORS
+    ):
+        self.code: str = code
+        self.file_name: str = file_name
+        self.abs_file_path: str = os.path.abspath(file_name)
+
+        self.lines: List[str] = code.split("\n")
+
+        # every compilation carries its own diagnostics state, which is
+        # what allows several files to be compiled in one process at once
+        self.report: Report = Report(self.file_name, self.lines, max_errors)
+
+    def had_err(self) -> bool:
+        return self.report.had_err
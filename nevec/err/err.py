@@ -3,7 +3,7 @@ from sys import stderr
 import emoji
 
 from enum import Enum, auto
-from typing import Dict, List, Optional, Self, Tuple
+from typing import Callable, Dict, List, Optional, Self, Tuple
 
 from nevec.err.color import Color
 from nevec.lex.tok import Loc
@@ -23,6 +23,9 @@ class NoteType(Enum):
     FIX = auto()
 
 
+type NoteKey = Tuple[int, int, int, int, NoteType]
+
+
 class Note:
     def __init__(self, type: NoteType, loc: Loc, msg: str):
         self.type: NoteType = type
@@ -48,20 +51,31 @@ class Note:
 
     def underline(self, col=1, initial_col=0) -> Tuple[int, str]:
         loc = self.loc
+        color = self.color()
+
+        parts: List[str] = []
+
+        while True:
+            if col == self.hang:
+                parts.append(color + "┬")
+
+            elif col >= loc.true_col - 1 and col <= self.length:
+                parts.append(color + "─")
 
-        if col == self.hang:
-            next = self.underline(col + 1, initial_col)
-            return (next[0] + 1, self.color() + "┬" + next[1])
+            elif col < loc.true_col:
+                parts.append(color + " ")
 
-        if col >= loc.true_col - 1 and col <= self.length:
-            next = self.underline(col + 1, initial_col)
-            return (next[0] + 1, self.color() + "─" + next[1])
+            else:
+                break
 
-        if col < loc.true_col:
-            next = self.underline(col + 1, initial_col)
-            return (next[0] + 1, self.color() + " " + next[1])
+            col += 1
 
-        return (initial_col, Color.RESET)
+        return (initial_col + len(parts), "".join(parts) + Color.RESET)
+
+    def key(self) -> NoteKey:
+        loc = self.loc
+
+        return (loc.col, loc.length, loc.true_col, loc.true_length, self.type)
 
     def color(self) -> str:
         match self.type:
@@ -74,6 +88,52 @@ class Note:
             case NoteType.ERR:
                 return Color.RED
 
+class RenderCache:
+    def __init__(self):
+        # colorized source lines, keyed by the line itself and its notes
+        self.colored: Dict[Tuple[str, Tuple[NoteKey, ...]], str] = {}
+
+        # underline rows only depend on where the notes are
+        self.underlines: Dict[Tuple[NoteKey, ...], str] = {}
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def colored_line(
+        self,
+        line: str,
+        notes: Tuple[NoteKey, ...],
+        make: Callable[[], str]
+    ) -> str:
+        return self.lookup(self.colored, (line, notes), make)
+
+    def underline_row(
+        self,
+        notes: Tuple[NoteKey, ...],
+        make: Callable[[], str]
+    ) -> str:
+        return self.lookup(self.underlines, notes, make)
+
+    def lookup[K](
+        self,
+        table: Dict[K, str],
+        key: K,
+        make: Callable[[], str]
+    ) -> str:
+        found = table.get(key)
+
+        if found is not None:
+            self.hits += 1
+            return found
+
+        self.misses += 1
+
+        made = make()
+        table[key] = made
+
+        return made
+
+
 class Line:
     def __init__(
         self, 
@@ -96,11 +156,13 @@ class Line:
         self, 
         lines: List[str], 
         given_line: Optional[str]=None,
-        given_line_number=1
+        given_line_number=1,
+        cache: Optional[RenderCache]=None
     ) -> List[str]:
         self.notes = sorted(self.notes, key=lambda n: n.loc.col)
 
-        self.get_cols()
+        self.cache: RenderCache = cache if cache is not None else RenderCache()
+        self.note_keys: Tuple[NoteKey, ...] = tuple(n.key() for n in self.notes)
 
         max_line = len(lines)
 
@@ -116,10 +178,9 @@ class Line:
 
             previous_line = self.previous_line(lines, max_line)
 
-            offending_line = lines[line - 1]
-            offending_line = "".join(self.color(offending_line))
+            offending_line = self.colored(lines[line - 1])
         else:
-            offending_line = "".join(self.color(given_line))
+            offending_line = self.colored(given_line)
             line_str = str(given_line_number)
 
         displayed_line = offset(
@@ -179,16 +240,23 @@ class Line:
         self.colors: Dict[int, str] = {
             i: n.color()
             for n in self.notes
-            for i in list(range(n.loc.col, n.loc.col + n.loc.length))
+            for i in range(n.loc.col, n.loc.col + n.loc.length)
         }
 
         self.cols = self.colors.keys()
 
+    def colored(self, line: str) -> str:
+        def make() -> str:
+            self.get_cols()
+            return "".join(self.color(line))
+
+        return self.cache.colored_line(line, self.note_keys, make)
+
     def emit_notes(self, max_line: int) -> List[str]:
         head = offset(
             Color.BLUE,
             " · ",
-            self.emit_underlines(),
+            self.cache.underline_row(self.note_keys, self.emit_underlines),
 
             by=digits_in(max_line)
         )
@@ -197,27 +265,34 @@ class Line:
 
         return [head] + hangs
         
-    def emit_underlines(self, col=0, index=0) -> str:
-        if index >= len(self.notes):
-            return ""
+    def emit_underlines(self) -> str:
+        col = 0
+        parts: List[str] = []
 
-        pair = self.notes[index].underline(col, col) 
+        for note in self.notes:
+            col, underline = note.underline(col, col)
+            parts.append(underline)
 
-        return pair[1] + self.emit_underlines(pair[0], index + 1)
+        return "".join(parts)
 
     def emit_hangs(self, notes_left: List[Note], max_line: int) -> List[str]:
-        def emit_each_hang(notes: List[Note], col=0) -> str:
-            if notes == []:
-                return ""
-        
-            note = notes[0] 
-            if col == note.hang:
-                if len(notes) == 1:
-                    return note.color() + "╰" 
-                
-                return note.color() + "│" + emit_each_hang(notes[1:], col + 1)
-            
-            return " " + emit_each_hang(notes, col + 1)
+        def emit_each_hang(notes: List[Note]) -> str:
+            parts: List[str] = []
+            col = 0
+
+            for i, note in enumerate(notes):
+                while col < note.hang:
+                    parts.append(" ")
+                    col += 1
+
+                if i == len(notes) - 1:
+                    parts.append(note.color() + "╰")
+                    break
+
+                parts.append(note.color() + "│")
+                col += 1
+
+            return "".join(parts)
         
         if notes_left == []:
             return [
@@ -239,27 +314,25 @@ class Line:
 
         return [line] + self.emit_hangs(notes_left[:-1], max_line)
 
-    def color(self, line: str, index=0, reset=False) -> List[str]:
-        if index == len(line):
-            if list(filter(lambda c: c > len(line), self.cols)) != []:
-                return [Color.RESET, Color.GRAY, "...", Color.RESET]
+    def color(self, line: str) -> List[str]:
+        parts: List[str] = []
+        reset = False
 
-            return [Color.RESET]
+        for index, char in enumerate(line):
+            color = self.colors.get(index + 1)
 
-        col = index + 1
+            if color is not None:
+                parts.append(color + char)
+                reset = True
+                continue
 
-        if col in self.cols:
-            return (
-                [self.colors[col] + line[index]] + 
-                self.color(line, index + 1, reset=True)
-            )
+            parts.append((Color.RESET if reset else "") + char)
+            reset = False
 
-        return (
-            [
-                (Color.RESET if reset else "") +
-                line[index]
-            ] + self.color(line, index + 1, reset=False)
-        )
+        if any(c > len(line) for c in self.cols):
+            return parts + [Color.RESET, Color.GRAY, "...", Color.RESET]
+
+        return parts + [Color.RESET]
 
 
 class Suggestion:
@@ -286,7 +359,11 @@ class Suggestion:
         self.loc.length = len(self.fix)
         self.loc.true_length = self.get_len(self.fix)
 
-    def emit(self, lines: List[str]) -> List[str]:
+    def emit(
+        self,
+        lines: List[str],
+        cache: Optional[RenderCache]=None
+    ) -> List[str]:
         source_line = lines[self.line - 1]
         chars = list(source_line)
 
@@ -305,7 +382,8 @@ class Suggestion:
         return as_line.emit(
             lines, 
             given_line=modified_line, 
-            given_line_number=self.line
+            given_line_number=self.line,
+            cache=cache
         )
 
     def as_line(self) -> Line:
@@ -335,13 +413,16 @@ class Err:
         file_name: str,
         code_lines: List[str],
         msg: str,
-        loc: Loc
+        loc: Loc,
+        cache: Optional[RenderCache]=None
     ):
         self.file_name: str = file_name
         self.code_lines: List[str] = code_lines
         self.msg: str = msg
         self.loc: Loc = loc
 
+        self.cache: RenderCache = cache if cache is not None else RenderCache()
+
         self.lines: List[Line] = []
         self.suggestions: List[Suggestion] = []
     
@@ -382,7 +463,7 @@ class Err:
         lines_and_suggestions = self.lines + self.suggestions
 
         lines = [
-            "\n".join(line.emit(self.code_lines))
+            "\n".join(line.emit(self.code_lines, cache=self.cache))
             for line in lines_and_suggestions
         ]
 
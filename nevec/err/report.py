@@ -1,33 +1,93 @@
-import os
+from sys import stderr
 
-from typing import List
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
 
-from nevec.err.err import Err
+from nevec.err.err import Err, RenderCache
 from nevec.lex.tok import Loc
 
+type ErrKey = Tuple[int, int, int, str]
+
+@dataclass
+class Diagnostic:
+    msg: str
+    line: int
+    col: int
+
+    # the fully rendered error, exactly as it was printed
+    text: str
+
+    def print(self):
+        print(self.text, file=stderr)
+
+
 class Report:
-    file_name: str
-    lines: List[str]
-    abs_file_path: str
-
-    @staticmethod
-    def setup(file_name: str, lines: List[str]):
-        Report.file_name = file_name
-        Report.lines = lines
-        Report.abs_file_path = os.path.abspath(file_name)
-
-    @staticmethod
-    def err(msg: str, loc: Loc) -> Err:
+    MAX_ERRORS = 20
+
+    def __init__(
+        self,
+        file_name: str,
+        lines: List[str],
+        max_errors: Optional[int]=MAX_ERRORS
+    ):
+        self.file_name: str = file_name
+        self.lines: List[str] = lines
+
+        self.had_err: bool = False
+
+        # None means no cap at all
+        self.max_errors: Optional[int] = max_errors
+
+        self.shown: int = 0
+        self.suppressed: int = 0
+        self.seen: Set[ErrKey] = set()
+
+        self.diagnostics: List[Diagnostic] = []
+
+        # shared by every error in this file, so that errors hitting the
+        # same lines don't have to colorize them all over again
+        self.cache: RenderCache = RenderCache()
+
+    def err(self, msg: str, loc: Loc) -> Err:
         return Err(
-            Report.file_name,
-            Report.lines,
+            self.file_name,
+            self.lines,
             msg,
-            loc
+            loc,
+            self.cache
         )
 
-    @staticmethod
-    def lexeme_of(loc: Loc) -> str:
-        line = Report.lines[loc.line - 1]
+    def show(self, err: Err):
+        self.had_err = True
+
+        key = self.key_of(err)
+
+        if key in self.seen or self.is_full():
+            self.suppress()
+            return
+
+        self.seen.add(key)
+        self.shown += 1
+
+        diagnostic = Diagnostic(err.msg, err.loc.line, err.loc.col, err.emit())
+        self.diagnostics.append(diagnostic)
+
+        diagnostic.print()
+
+    def suppress(self):
+        self.had_err = True
+        self.suppressed += 1
+
+    def is_full(self) -> bool:
+        return self.max_errors is not None and self.shown >= self.max_errors
+
+    def key_of(self, err: Err) -> ErrKey:
+        loc = err.loc
+
+        return (loc.line, loc.col, loc.length, err.msg)
+
+    def lexeme_of(self, loc: Loc) -> str:
+        line = self.lines[loc.line - 1]
         col = loc.col - 1
 
         return line[col:col + loc.length]
@@ -0,0 +1,230 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from nevec.ir.ir import *
+
+from nevec.lex.tok import Loc
+
+class Block:
+    def __init__(self, id: int):
+        self.id: int = id
+
+        # phis always come first, and all of them take effect at once
+        self.phis: List[Tac] = []
+        self.tacs: List[Tac] = []
+
+        self.preds: List[Block] = []
+        self.succs: List[Block] = []
+
+        # a block with two successors branches on this symbol, going to
+        # `succs[0]` if it's true and to `succs[1]` otherwise
+        self.cond: Optional[Sym] = None
+
+        # filled in by `Cfg.compute_doms`
+        self.idom: Optional[Block] = None
+        self.children: List[Block] = []
+
+    def add(self, tac: Tac):
+        self.tacs.append(tac)
+
+    def all_tacs(self) -> List[Tac]:
+        return self.phis + self.tacs
+
+    def __repr__(self) -> str:
+        lines = [f"b{self.id}:"] + [f"  {t}" for t in self.all_tacs()]
+
+        if self.cond is not None:
+            then, otherwise = self.succs
+            lines.append(f"  br {self.cond} b{then.id} b{otherwise.id}")
+        elif self.succs != []:
+            lines.append(f"  jmp b{self.succs[0].id}")
+
+        return "\n".join(lines)
+
+
+class Cfg:
+    def __init__(self, syms: Syms):
+        self.syms: Syms = syms
+
+        self.blocks: List[Block] = []
+        self.entry: Block = self.new_block()
+
+        # the order from the last `compute_doms`, along with each block's
+        # position in it
+        self.order: List[Block] = []
+        self.rpo_index: Dict[int, int] = {}
+
+    @staticmethod
+    def of(ir: List[Tac], syms: Syms) -> "Cfg":
+        # straight-line code is just one block
+        cfg = Cfg(syms)
+
+        for tac in ir:
+            cfg.entry.add(tac)
+
+        return cfg
+
+    def new_block(self) -> Block:
+        block = Block(len(self.blocks))
+
+        self.blocks.append(block)
+
+        return block
+
+    def connect(self, pred: Block, succ: Block):
+        pred.succs.append(succ)
+        succ.preds.append(pred)
+
+    def branch(self, block: Block, cond: Sym, then: Block, otherwise: Block):
+        block.cond = cond
+        cond.uses += 1
+
+        self.connect(block, then)
+        self.connect(block, otherwise)
+
+    def phi(
+        self,
+        block: Block,
+        incoming: List[Tuple[Block, Tac]],
+        loc: Loc,
+        name: str="t"
+    ) -> Tac:
+        assert len(incoming) == len(block.preds)
+
+        operands = [(b.id, t.operand()) for b, t in incoming]
+        type = operands[0][1].type
+
+        for _, tac in incoming:
+            tac.sym.uses += 1
+
+        # the real moment is only known once the blocks are laid out, see
+        # `number`
+        sym = self.syms.new_sym(Syms.NO_MOMENT, name)
+
+        tac = Tac(sym, Phi(operands, loc, type), loc)
+        block.phis.append(tac)
+
+        return tac
+
+    def reverse_postorder(self) -> List[Block]:
+        postorder: List[Block] = []
+        seen: Set[int] = {self.entry.id}
+
+        # an explicit stack of (block, next successor to look at), so that
+        # long chains of blocks don't hit the recursion limit
+        stack: List[Tuple[Block, int]] = [(self.entry, 0)]
+
+        while stack:
+            block, i = stack.pop()
+
+            if i < len(block.succs):
+                stack.append((block, i + 1))
+
+                succ = block.succs[i]
+
+                if succ.id not in seen:
+                    seen.add(succ.id)
+                    stack.append((succ, 0))
+
+                continue
+
+            postorder.append(block)
+
+        return postorder[::-1]
+
+    def compute_doms(self):
+        # Cooper, Harvey and Kennedy's "A Simple, Fast Dominance Algorithm"
+        self.order = self.reverse_postorder()
+        self.rpo_index = {b.id: i for i, b in enumerate(self.order)}
+
+        for block in self.blocks:
+            block.idom = None
+            block.children = []
+
+        self.entry.idom = self.entry
+
+        changed = True
+
+        while changed:
+            changed = False
+
+            for block in self.order[1:]:
+                preds = [p for p in block.preds if p.idom is not None]
+
+                new_idom = preds[0]
+
+                for pred in preds[1:]:
+                    new_idom = self.intersect(pred, new_idom)
+
+                if block.idom is not new_idom:
+                    block.idom = new_idom
+                    changed = True
+
+        for block in self.order[1:]:
+            assert block.idom is not None
+
+            block.idom.children.append(block)
+
+    def intersect(self, a: Block, b: Block) -> Block:
+        index = self.rpo_index
+
+        while a is not b:
+            while index[a.id] > index[b.id]:
+                assert a.idom is not None
+                a = a.idom
+
+            while index[b.id] > index[a.id]:
+                assert b.idom is not None
+                b = b.idom
+
+        return a
+
+    def dominates(self, a: Block, b: Block) -> bool:
+        runner: Optional[Block] = b
+
+        while runner is not None:
+            if runner is a:
+                return True
+
+            if runner is self.entry:
+                return False
+
+            runner = runner.idom
+
+        return False
+
+    def frontiers(self) -> Dict[int, Set[int]]:
+        frontiers: Dict[int, Set[int]] = {b.id: set() for b in self.blocks}
+
+        for block in self.order:
+            if len(block.preds) < 2:
+                continue
+
+            for pred in block.preds:
+                runner = pred
+
+                # unreachable predecessors never got an idom
+                while runner is not block.idom and runner.idom is not None:
+                    frontiers[runner.id].add(block.id)
+                    runner = runner.idom
+
+        return frontiers
+
+    def linearize(self) -> List[Tac]:
+        order = self.order if self.order != [] else self.reverse_postorder()
+
+        return [t for b in order for t in b.all_tacs()]
+
+    def number(self):
+        # lays the blocks out and gives every definition the moment it ends
+        # up at, which keeps moments unique and increasing
+        for moment, tac in enumerate(self.linearize()):
+            if not tac.defines():
+                continue
+
+            self.syms.firsts[tac.sym.id] = moment
+            tac.moment = moment
+
+    def __repr__(self) -> str:
+        order = self.order if self.order != [] else self.reverse_postorder()
+
+        return "\n".join(map(str, order))
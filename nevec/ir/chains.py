@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional
+
+from nevec.ir.ir import *
+
+class DefUse:
+    def __init__(self, ir: List[Tac]):
+        # removed Tacs leave a hole behind rather than shifting everything
+        # after them, so that positions stay valid for as long as the
+        # index lives
+        self.tacs: List[Optional[Tac]] = []
+        self.positions: Dict[Tac, int] = {}
+
+        self.defs: Dict[int, Tac] = {}
+
+        # the users of each symbol, as an ordered set, and how many operands
+        # read it in all--`t1 = t0 * t0` is a single user but two uses, just
+        # like `Verify` counts them
+        self.users: Dict[int, Dict[Tac, None]] = {}
+        self.uses: Dict[int, int] = {}
+
+        # what each Tac used when it was indexed--passes rewrite Tacs in
+        # place, so this can't be recomputed on removal
+        self.used: Dict[Tac, List[int]] = {}
+
+        for tac in ir:
+            self.append(tac)
+
+    def append(self, tac: Tac):
+        self.insert(tac, len(self.tacs))
+
+        self.tacs.append(tac)
+
+    def insert(self, tac: Tac, position: int):
+        self.positions[tac] = position
+
+        if tac.defines():
+            self.defs[tac.sym.id] = tac
+
+        used = [s.id for s in tac.used_syms()]
+        self.used[tac] = used
+
+        for id in used:
+            self.users.setdefault(id, {})[tac] = None
+            self.uses[id] = self.uses.get(id, 0) + 1
+
+    def remove(self, tac: Tac) -> int:
+        position = self.positions.pop(tac)
+
+        self.tacs[position] = None
+
+        if self.defs.get(tac.sym.id) is tac:
+            del self.defs[tac.sym.id]
+
+        for id in self.used.pop(tac):
+            # a Tac reading the same symbol twice is only a user once
+            self.users[id].pop(tac, None)
+            self.uses[id] -= 1
+
+        return position
+
+    def replace(self, old: Tac, new: Tac):
+        position = self.remove(old)
+
+        self.insert(new, position)
+
+        self.tacs[position] = new
+
+    def def_of(self, sym: Sym) -> Optional[Tac]:
+        return self.defs.get(sym.id)
+
+    def users_of(self, sym: Sym) -> List[Tac]:
+        return list(self.users.get(sym.id, {}))
+
+    def uses_of(self, sym: Sym) -> int:
+        return self.uses.get(sym.id, 0)
+
+    def position_of(self, tac: Tac) -> Optional[int]:
+        return self.positions.get(tac)
+
+    def write_uses(self, syms: Syms):
+        # brings the use counts `Syms.cleanup` relies on in line with the
+        # index
+        for sym in syms.syms:
+            sym.uses = self.uses_of(sym)
+
+    def ir(self) -> List[Tac]:
+        return [t for t in self.tacs if t is not None]
+
+    def __len__(self) -> int:
+        return len(self.positions)
@@ -0,0 +1,78 @@
+from typing import Dict, List
+
+from nevec.ast.type import Type
+
+from nevec.ir.ir import *
+from nevec.ir.live import Liveness
+from nevec.ir.reg import InterferenceGraph
+
+from nevec.lex.tok import Loc
+
+class Fun:
+    def __init__(self, name: str, index: int, params: List[Type], loc: Loc):
+        self.name: str = name
+        self.index: int = index
+        self.loc: Loc = loc
+
+        # every function numbers its own symbols and registers, starting
+        # from 0
+        self.syms: Syms = Syms()
+
+        self.params: List[Tac] = [
+            Tac(self.syms.new_sym(i, "p"), IParam(i, loc, type), loc)
+            for i, type in enumerate(params)
+        ]
+
+        self.ir: List[Tac] = list(self.params)
+
+    def arity(self) -> int:
+        return len(self.params)
+
+    def call(
+        self,
+        syms: Syms,
+        args: List[Tac],
+        moment: Moment,
+        loc: Loc,
+        type: Type
+    ) -> Tac:
+        assert len(args) == self.arity()
+
+        expr = ICall(
+            self.name,
+            self.index,
+            [a.operand() for a in args],
+            loc,
+            type
+        )
+
+        for arg in args:
+            arg.sym.last_used(moment)
+
+        return Tac(syms.new_sym(moment), expr, loc)
+
+    def allocate(self) -> InterferenceGraph:
+        # an unused parameter still takes up its register, just for the
+        # moment it's defined in, which liveness takes care of
+        Liveness.of(self.ir).apply(self.syms, self.ir)
+
+        # the caller's window puts the arguments in the callee's first
+        # registers, in order
+        fixed: Dict[int, int] = {
+            p.sym.id: p.expr.index
+            for p in self.params
+            if isinstance(p.expr, IParam)
+        }
+
+        calls = [t for t in self.ir if isinstance(t.expr, ICall)]
+
+        return InterferenceGraph(
+            self.syms.values(),
+            fixed=fixed,
+            calls=calls
+        )
+
+    def __repr__(self) -> str:
+        header = f"fun {self.name}/{self.arity()}:"
+
+        return "\n".join([header] + [f"  {t}" for t in self.ir])
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 from enum import auto, Enum
 
@@ -31,6 +31,9 @@ class IExpr:
         self.type: Type = type
         self.loc: Loc = loc
 
+    def operands(self) -> List["Operand"]:
+        return []
+
 
 class SetIExpr(IExpr):
     def __init__(self, type: Type, loc: Loc):
@@ -75,6 +78,19 @@ class Tac:
     def next_moment(self) -> Moment:
         return self.moment + 1
 
+    def defines(self) -> bool:
+        # `ret` and table sets only reuse symbols defined elsewhere
+        return (
+            isinstance(self.expr, IExpr) and
+            not isinstance(self.expr, SetIExpr)
+        )
+
+    def used_syms(self) -> List[Sym]:
+        if isinstance(self.expr, IOp):
+            return [self.expr.sym]
+
+        return [o.sym for o in self.expr.operands()]
+
     def operand(self) -> Operand:
         assert isinstance(self.expr, IExpr)
 
@@ -131,6 +147,9 @@ class IUnOp(IExpr):
         self.loc: Loc = loc
         self.type: Type = type
 
+    def operands(self) -> List[Operand]:
+        return [self.operand]
+
     def __repr__(self) -> str:
         match self.op:
             case IUnOp.Op.NEG:
@@ -193,6 +212,9 @@ class IBinOp(IExpr):
         self.loc: Loc = loc
         self.type = type
 
+    def operands(self) -> List[Operand]:
+        return [self.left, self.right]
+
     def __repr__(self) -> str:
         return f"{self.left} {self.op_lexeme} {self.right}"
 
@@ -211,6 +233,9 @@ class IConcat(IExpr):
         self.loc: Loc = loc
         self.type = type
 
+    def operands(self) -> List[Operand]:
+        return [self.left, self.right]
+
     def op(self) -> Opcode:
         assert self.left.type == self.right.type
 
@@ -220,6 +245,99 @@ class IConcat(IExpr):
         return f"{self.left} concat {self.right}"
 
 
+class IConcatN(IExpr):
+    # the VM reads the operand count from a single byte
+    MAX_PARTS = 255
+
+    def __init__(
+        self,
+        parts: List[Operand],
+        loc: Loc,
+        type: Type,
+    ):
+        self.parts: List[Operand] = parts
+
+        self.loc: Loc = loc
+        self.type = type
+
+    def operands(self) -> List[Operand]:
+        return self.parts
+
+    def op(self) -> Opcode:
+        is_ascii = all(p.type == Types.STR for p in self.parts)
+
+        return Opcode.CONCATN if is_ascii else Opcode.UCONCATN
+
+    def __repr__(self) -> str:
+        return "concat " + " ".join(map(str, self.parts))
+
+
+class Phi(IExpr):
+    def __init__(
+        self,
+        incoming: List[Tuple[int, Operand]],
+        loc: Loc,
+        type: Type,
+    ):
+        # pairs of predecessor block ids and the operand flowing in from
+        # each of them
+        self.incoming: List[Tuple[int, Operand]] = incoming
+
+        self.loc: Loc = loc
+        self.type: Type = type
+
+    def operands(self) -> List[Operand]:
+        return [o for _, o in self.incoming]
+
+    def __repr__(self) -> str:
+        incoming = ", ".join(f"b{b}: {o}" for b, o in self.incoming)
+
+        return f"phi [{incoming}]"
+
+
+class IParam(IExpr):
+    def __init__(self, index: int, loc: Loc, type: Type):
+        self.index: int = index
+
+        self.loc: Loc = loc
+        self.type: Type = type
+
+    def __repr__(self) -> str:
+        return f"param {self.index}"
+
+
+class ICall(IExpr):
+    def __init__(
+        self,
+        callee: str,
+        index: int,
+        args: List[Operand],
+        loc: Loc,
+        type: Type,
+    ):
+        self.callee: str = callee
+        self.index: int = index
+
+        # every argument has to be a symbol used by this call alone, so that
+        # the allocator can place it straight into the callee's window
+        self.args: List[Operand] = args
+
+        self.loc: Loc = loc
+        self.type: Type = type
+
+        # the first register of the callee's window, filled in by the
+        # register allocator
+        self.base: int = -1
+
+    def operands(self) -> List[Operand]:
+        return self.args
+
+    def __repr__(self) -> str:
+        args = ", ".join(map(str, self.args))
+
+        return f"call {self.callee}({args})"
+
+
 class TableSet(SetIExpr):
     def __init__(
         self,
@@ -237,6 +355,9 @@ class TableSet(SetIExpr):
         self.type: Type = type
         self.loc: Loc = loc
 
+    def operands(self) -> List[Operand]:
+        return [self.table, self.key, self.expr]
+
     def __repr__(self) -> str:
         return f"{self.table}[{self.key}] = {self.expr}"
 
@@ -255,6 +376,9 @@ class TableGet(IExpr):
         self.loc: Loc = loc
         self.type: Type = type
 
+    def operands(self) -> List[Operand]:
+        return [self.table, self.key]
+
     def __repr__(self) -> str:
         return f"{self.table}[{self.key}]"
 
@@ -0,0 +1,194 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from nevec.ir.cfg import Block, Cfg
+from nevec.ir.ir import *
+
+# what a single instruction reads, and the symbol it defines, if any
+type Step = Tuple[List[int], Optional[int]]
+
+# where a symbol is defined and where it's read for the last time
+type Interval = Tuple[int, int]
+
+def write_lifetimes(syms: Syms, intervals: Dict[int, Interval]):
+    for id, (first, last) in intervals.items():
+        syms.firsts[id] = first
+        syms.lasts[id] = last
+
+class Liveness:
+    def __init__(self, steps: List[Step]):
+        # both keyed by symbol id, as positions among `steps`
+        self.defs: Dict[int, int] = {}
+        self.lasts: Dict[int, int] = {}
+
+        for position, (used, defined) in enumerate(steps):
+            for id in used:
+                self.lasts[id] = position
+
+            if defined is not None:
+                self.defs[defined] = position
+
+    @staticmethod
+    def of(ir: List[Tac]) -> "Liveness":
+        return Liveness([
+            (
+                [s.id for s in tac.used_syms()],
+                tac.sym.id if tac.defines() else None
+            )
+            for tac in ir
+        ])
+
+    def interval(self, id: int) -> Interval:
+        first = self.defs[id]
+
+        # a definition nothing reads still takes up its register while it's
+        # being written
+        return first, self.lasts.get(id, first)
+
+    def intervals(self) -> Dict[int, Interval]:
+        return {id: self.interval(id) for id in self.defs}
+
+    def live_in(self, position: int) -> Set[int]:
+        # what has to be in a register right before `position` runs
+        return set(
+            id
+            for id, (first, last) in self.intervals().items()
+            if first < position <= last
+        )
+
+    def live_out(self, position: int) -> Set[int]:
+        return set(
+            id
+            for id, (first, last) in self.intervals().items()
+            if first <= position < last
+        )
+
+    def apply(self, syms: Syms, ir: List[Tac]):
+        # moments become positions in `ir`, so that lifetimes say exactly
+        # where each symbol is read, however the IR was numbered before
+        write_lifetimes(syms, self.intervals())
+
+        for position, tac in enumerate(ir):
+            tac.moment = position
+
+
+class BlockLiveness:
+    def __init__(self, cfg: Cfg):
+        self.cfg: Cfg = cfg
+
+        # keyed by block id
+        self.live_in: Dict[int, Set[int]] = {b.id: set() for b in cfg.blocks}
+        self.live_out: Dict[int, Set[int]] = {b.id: set() for b in cfg.blocks}
+
+        self.uses: Dict[int, Set[int]] = {}
+        self.defs: Dict[int, Set[int]] = {}
+
+        for block in cfg.blocks:
+            self.uses[block.id], self.defs[block.id] = self.local(block)
+
+        self.solve()
+
+    def local(self, block: Block) -> Tuple[Set[int], Set[int]]:
+        # phis read their operands at the end of each predecessor, see
+        # `phi_uses`, but they define their symbols right here
+        defs = set(t.sym.id for t in block.phis)
+        uses: Set[int] = set()
+
+        for tac in block.tacs:
+            uses |= set(s.id for s in tac.used_syms()) - defs
+
+            if tac.defines():
+                defs.add(tac.sym.id)
+
+        if block.cond is not None and block.cond.id not in defs:
+            uses.add(block.cond.id)
+
+        return uses, defs
+
+    def phi_uses(self, block: Block, pred: Block) -> Set[int]:
+        return set(
+            o.sym.id
+            for phi in block.phis
+            if isinstance(phi.expr, Phi)
+            for b, o in phi.expr.incoming
+            if b == pred.id
+        )
+
+    def solve(self):
+        # successors mostly come before their predecessors in postorder,
+        # which only loops have to go around more than once for
+        order = self.cfg.reverse_postorder()[::-1]
+
+        changed = True
+
+        while changed:
+            changed = False
+
+            for block in order:
+                live_out: Set[int] = set()
+
+                for succ in block.succs:
+                    live_out |= self.live_in[succ.id]
+                    live_out |= self.phi_uses(succ, block)
+
+                defs = self.defs[block.id]
+                live_in = self.uses[block.id] | (live_out - defs)
+
+                if live_in != self.live_in[block.id]:
+                    changed = True
+
+                self.live_out[block.id] = live_out
+                self.live_in[block.id] = live_in
+
+    def intervals(self) -> Dict[int, Interval]:
+        # lays the blocks out and gives each a position of its own at the
+        # end, where it branches and where its successors' phis read it.
+        # a symbol gets the single interval covering everywhere it's live,
+        # which is conservative around blocks it skips over
+        order = self.cfg.order if self.cfg.order != [] else (
+            self.cfg.reverse_postorder()
+        )
+
+        firsts: Dict[int, int] = {}
+        lasts: Dict[int, int] = {}
+
+        def extend(id: int, position: int):
+            lasts[id] = max(lasts.get(id, position), position)
+
+        position = 0
+
+        for block in order:
+            start = position
+
+            for tac in block.all_tacs():
+                if not isinstance(tac.expr, Phi):
+                    for sym in tac.used_syms():
+                        extend(sym.id, position)
+
+                if tac.defines():
+                    firsts[tac.sym.id] = position
+                    extend(tac.sym.id, position)
+
+                position += 1
+
+            for id in self.live_in[block.id]:
+                extend(id, start)
+
+            for id in self.live_out[block.id]:
+                extend(id, position)
+
+            if block.cond is not None:
+                extend(block.cond.id, position)
+
+            position += 1
+
+        return {id: (first, lasts[id]) for id, first in firsts.items()}
+
+    def apply(self, syms: Syms):
+        intervals = self.intervals()
+
+        write_lifetimes(syms, intervals)
+
+        for block in self.cfg.blocks:
+            for tac in block.all_tacs():
+                if tac.defines():
+                    tac.moment = intervals[tac.sym.id][0]
@@ -1,46 +1,88 @@
-from typing import Dict, Self, List, Tuple
+import bisect
+import heapq
 
+from itertools import compress
+from typing import Dict, Optional, List, Set, Tuple
+
+from nevec.ir.ir import ICall, Phi, Tac
 from nevec.ir.sym import Sym
 
-class Vertex:
-    def __init__(self, name: str, value: int):
-        self.name: str = name
-        self.value: int = value
-        
-        self.reg: int = -1
+type Copy = Tuple[Sym, Sym]
 
-        self.adjacent: List[Vertex] = []
-        self.unavailable_regs: List[int] = []
+# turns the digits of `bin()` into zero and one bytes
+BITS = bytes.maketrans(b"01", b"\x00\x01")
 
-    def next_reg(self, reg=0):
-        if self.unavailable_regs == []:
-            self.unavailable_regs = [v.reg for v in self.adjacent]
+def copies_in(ir: List[Tac]) -> List[Copy]:
+    # a phi becomes a move from each of its operands once the blocks are
+    # laid out, unless they all end up sharing one register.  only IR laid
+    # out from a `Cfg` has phis--straight-line IR has no copies at all
+    return [
+        (tac.sym, o.sym)
+        for tac in ir
+        if isinstance(tac.expr, Phi)
+        for o in tac.expr.operands()
+    ]
 
-        if reg not in self.unavailable_regs:
-            self.reg = reg
-            return
+class InterferenceGraph:
+    # operands are a single byte; the conservative coalescing test needs to
+    # know how many registers there really are, see `reg_count`
+    REG_COUNT = 256
 
-        self.next_reg(reg + 1)
+    # the orders vertices can be coloured in, see `assign_registers`
+    ORDERS = ("creation", "smallest-last", "dsatur")
 
-    def connect(self, to: Self):
-        self.adjacent.append(to)
-        to.adjacent.append(self)
+    def __init__(
+        self,
+        syms: List[Sym],
+        debug=False,
+        fixed: Optional[Dict[int, int]]=None,
+        calls: Optional[List[Tac]]=None,
+        copies: Optional[List[Copy]]=None,
+        order: str="creation",
+        reg_count: int=REG_COUNT
+    ):
+        assert order in InterferenceGraph.ORDERS
 
-    def assign(self, reg: int):
-        self.reg = reg
+        self.syms: List[Sym] = syms
+        self.order: str = order
 
-    def __repr__(self) -> str:
-        return f"{self.name} r{self.reg}"
+        # the registers left to colour with, once scratch registers are set
+        # aside
+        self.reg_count: int = reg_count
 
-class InterferenceGraph:
-    def __init__(self, syms: List[Sym], debug=False):
-        self.regs: Dict[str, Vertex] = {}
+        # symbols that must live in a given register, keyed by symbol id--
+        # a function's parameters, for instance
+        self.fixed: Dict[int, int] = fixed if fixed is not None else {}
+
+        self.calls: List[Tac] = calls if calls is not None else []
+
+        assert all(s.lifetime is not None for s in syms)
+
+        # vertices are numbered densely, in the order lifetimes start, so
+        # that each vertex's neighbours are numbered close to it
+        self.by_first: List[Sym] = sorted(syms, key=lambda s: (s.first, s.id))
+        self.vertices: Dict[int, int] = {
+            s.id: v
+            for v, s in enumerate(self.by_first)
+        }
+
+        count = len(self.by_first)
+
+        # neighbours are bitsets, where bit k of `adjacent[v]` stands for
+        # vertex `lows[v] + k`--offsetting them keeps them as small as the
+        # span of each vertex's neighbours, instead of growing with `v`
+        self.adjacent: List[int] = [0] * count
+        self.lows: List[int] = list(range(count))
+
+        # coalesced vertices point at the vertex they were merged into
+        self.leaders: List[int] = list(range(count))
 
-        # print(list(filter(lambda s: s.lifetime is None, syms)))
-        assert list(filter(lambda s: s.lifetime is None, syms)) == []
+        self.colours: List[int] = [-1] * count
 
-        self.draw_edges(based_on=syms)
+        self.draw_edges()
+        self.coalesce(copies if copies is not None else [])
         self.assign_registers()
+        self.place_windows()
 
         if debug:
             print(" ".join(
@@ -50,59 +92,395 @@ class InterferenceGraph:
                 ]
             ))
 
-            print(self.regs)
+            print({s.full_name: self.get_reg(s) for s in syms})
 
-    def draw_edges(self, based_on: List[Sym]):
-        def check(syms: List[Tuple[int, Sym]]):
-            def each(
-                sym: Tuple[int, Sym],
-                other_syms: List[Tuple[int, Sym]]
-            ):
-                if other_syms == []:
-                    return
+    def draw_edges(self):
+        firsts = [s.first for s in self.by_first]
 
-                other = other_syms[0]
+        # a sweep over the lifetimes in the order they start: the symbols
+        # still alive when `v` is defined are its neighbours before it, and
+        # the ones defined before `v` dies are its neighbours after it
+        expiring: List[Tuple[int, int, int]] = []
 
-                sym_itself = sym[1]
-                other_sym = other[1]
-                
-                other_lifetime = other_sym.lifetime
-                sym_lifetime = sym_itself.lifetime 
+        # the live symbols, as a bitset offset by `low` like the others
+        active = 0
+        low = 0
 
-                # this is silly too
-                assert sym_lifetime is not None and other_lifetime is not None
+        for v, sym in enumerate(self.by_first):
+            first = sym.first
 
-                if sym_lifetime.intersects_with(other_lifetime):
-                    other_vertex = self.regs[other_sym.full_name]
-                    vertex = self.regs[sym_itself.full_name]
+            last = sym.last
+            assert last is not None
 
-                    vertex.connect(to=other_vertex)
+            # see `Lifetime.intersects_with`: a lifetime is over once it
+            # ends, unless it started right there too
+            while expiring != [] and expiring[0][:2] < (first, first):
+                _, _, u = heapq.heappop(expiring)
+                active &= ~(1 << (u - low))
 
-                each(sym, other_syms[1:])
+            if active == 0:
+                low = v
+            else:
+                # drops the dead vertices at the bottom of the window
+                shift = (active & -active).bit_length() - 1
+                active >>= shift
+                low += shift
 
-            if syms == []:
-                return
+            end = bisect.bisect_left(firsts, max(last, first + 1), lo=v + 1)
+            after = ((1 << (end - v - 1)) - 1) << (v + 1 - low)
 
-            head = syms[0]
+            self.adjacent[v] = active | after
+            self.lows[v] = low
 
-            each(head, syms[1:])
-            check(syms[1:])
+            active |= 1 << (v - low)
+            heapq.heappush(expiring, (last, first, v))
 
-        self.regs = {
-            s.full_name: Vertex(s.full_name, i)
-            for i, s in enumerate(based_on)
-        }
+    def add_bit(self, v: int, u: int):
+        low = self.lows[v]
+
+        if u < low:
+            self.adjacent[v] <<= low - u
+            self.lows[v] = low = u
+
+        self.adjacent[v] |= 1 << (u - low)
+
+    def connect(self, u: int, v: int):
+        self.add_bit(u, v)
+        self.add_bit(v, u)
+
+    def disconnect(self, u: int, v: int):
+        self.adjacent[u] &= ~(1 << (v - self.lows[u]))
+        self.adjacent[v] &= ~(1 << (u - self.lows[v]))
+
+    def interferes(self, u: int, v: int) -> bool:
+        low = self.lows[u]
+
+        return v >= low and (self.adjacent[u] >> (v - low)) & 1 == 1
+
+    def neighbours(self, v: int) -> List[int]:
+        low = self.lows[v]
+
+        # peeling bits off one at a time costs as much as the whole int
+        # for every bit, so this goes through its digits instead, lowest
+        # bit first
+        digits = bin(self.adjacent[v])[:1:-1].encode().translate(BITS)
+
+        return list(compress(range(low, low + len(digits)), digits))
+
+    def degree(self, v: int) -> int:
+        return self.adjacent[v].bit_count()
+
+    def leader(self, v: int) -> int:
+        while self.leaders[v] != v:
+            self.leaders[v] = self.leaders[self.leaders[v]]
+            v = self.leaders[v]
+
+        return v
+
+    def vertex(self, sym: Sym) -> int:
+        return self.leader(self.vertices[sym.id])
+
+    def pinned(self) -> Set[int]:
+        # call arguments are placed last, see `place_windows`
+        args = set(
+            o.sym.id
+            for c in self.calls
+            for o in c.expr.operands()
+        )
 
-        check(list(enumerate(based_on)))
+        return args | set(self.fixed)
+
+    def coalesce(self, copies: List[Copy]):
+        # Briggs' conservative test: two vertices that don't interfere are
+        # merged only if the result has fewer than `reg_count` neighbours of
+        # significant degree, so that merging can never make the graph
+        # harder to colour
+        pinned = self.pinned()
+
+        for dest, src in copies:
+            if dest.id not in self.vertices or src.id not in self.vertices:
+                continue
+
+            # registers that are decided up front can't move around
+            if dest.id in pinned or src.id in pinned:
+                continue
+
+            v = self.vertex(dest)
+            other = self.vertex(src)
+
+            if v == other or self.interferes(v, other):
+                continue
+
+            neighbours = set(self.neighbours(v)) | set(self.neighbours(other))
+
+            significant = sum(
+                1
+                for n in neighbours
+                if self.degree(n) >= self.reg_count
+            )
+
+            if significant >= self.reg_count:
+                continue
+
+            self.merge(v, other)
+
+    def merge(self, v: int, other: int):
+        # `other` disappears, and whoever interfered with it now interferes
+        # with `v` instead
+        for n in list(self.neighbours(other)):
+            self.disconnect(n, other)
+
+            if not self.interferes(v, n):
+                self.connect(v, n)
+
+        self.leaders[other] = v
 
     def assign_registers(self):
-        vertices = list(self.regs.values())
+        for id, reg in self.fixed.items():
+            self.colours[self.leader(self.vertices[id])] = reg
+
+        pinned = self.pinned()
+
+        # coalesced symbols share their vertex, which gets coloured once
+        vertices = list({
+            self.vertex(s): None
+            for s in self.syms
+            if s.id not in pinned
+        })
+
+        match self.order:
+            case "smallest-last":
+                vertices = self.smallest_last(vertices)
+
+            case "dsatur":
+                self.dsatur(vertices)
+                return
+
+        for v in vertices:
+            self.colour(v)
+
+    def smallest_last(self, vertices: List[int]) -> List[int]:
+        # keeps taking out a vertex of the smallest degree left; coloured
+        # in the reverse order, every vertex has at most that many
+        # neighbours coloured before it
+        degrees: Dict[int, int] = {v: self.degree(v) for v in vertices}
+
+        buckets: List[Set[int]] = [
+            set()
+            for _ in range(max(degrees.values(), default=0) + 1)
+        ]
+
+        for v, degree in degrees.items():
+            buckets[degree].add(v)
+
+        removed: List[int] = []
+        lowest = 0
+
+        while len(removed) < len(vertices):
+            while buckets[lowest] == set():
+                lowest += 1
+
+            v = buckets[lowest].pop()
+            removed.append(v)
+
+            del degrees[v]
+
+            for n in self.neighbours(v):
+                degree = degrees.get(n)
 
-        # using list() because silly Python doesn't immediately interpretet
-        # map() expressions
-        list(map(Vertex.next_reg, vertices))
+                if degree is None:
+                    continue
 
-        self.regs = {v.name: v for v in vertices}
+                buckets[degree].remove(n)
+                buckets[degree - 1].add(n)
+
+                degrees[n] = degree - 1
+
+            # taking `v` out lowers its neighbours' degrees by one at most
+            lowest = max(lowest - 1, 0)
+
+        return removed[::-1]
+
+    def dsatur(self, vertices: List[int]):
+        # Brélaz' DSatur: always colours the vertex whose neighbours hold
+        # the most distinct registers already, breaking ties by degree
+        left = set(vertices)
+
+        # the registers each vertex's neighbours hold, as a bitset
+        seen: Dict[int, int] = {v: self.taken(v) for v in vertices}
+
+        # stale entries are just skipped, since saturation only grows
+        queue = [(-seen[v].bit_count(), -self.degree(v), v) for v in vertices]
+        heapq.heapify(queue)
+
+        while queue != []:
+            _, _, v = heapq.heappop(queue)
+
+            if v not in left:
+                continue
+
+            left.remove(v)
+
+            reg = InterferenceGraph.lowest_free(seen[v])
+            self.colours[v] = reg
+
+            bit = 1 << reg
+
+            for n in self.neighbours(v):
+                if n not in left or seen[n] & bit != 0:
+                    continue
+
+                seen[n] |= bit
+
+                heapq.heappush(
+                    queue,
+                    (-seen[n].bit_count(), -self.degree(n), n)
+                )
+
+    def colour(self, v: int):
+        regs = set(map(self.colours.__getitem__, self.neighbours(v)))
+        regs.discard(-1)
+
+        # the neighbours hold exactly registers 0 through n - 1, which is
+        # what most vertices of a dense graph see
+        if max(regs, default=-1) == len(regs) - 1:
+            self.colours[v] = len(regs)
+            return
+
+        self.colours[v] = InterferenceGraph.lowest_free(self.taken(v))
+
+    def taken(self, v: int) -> int:
+        taken = 0
+
+        for reg in set(map(self.colours.__getitem__, self.neighbours(v))):
+            if reg >= 0:
+                taken |= 1 << reg
+
+        return taken
+
+    @staticmethod
+    def lowest_free(taken: int) -> int:
+        # the lowest clear bit of `taken`
+        return (~taken & (taken + 1)).bit_length() - 1
+
+    def place_windows(self):
+        # a call passes its arguments by sliding the register window: they
+        # sit in consecutive registers, right above everything the caller
+        # still needs, and become the callee's first registers.
+        #
+        # the last call goes first: an enclosing call's arguments are live
+        # across the calls nested in it, like `a` in `f(a, g(b))`, so their
+        # windows have to be in place before g's base can go above them.
+        # nothing a call reads is live across a later one
+        for call in sorted(self.calls, key=lambda c: c.moment, reverse=True):
+            expr = call.expr
+
+            assert isinstance(expr, ICall)
+
+            args = [o.sym for o in expr.args]
+            arg_ids = set(s.id for s in args)
+
+            neighbours = [
+                self.colours[n]
+                for s in args
+                for n in self.neighbours(self.vertex(s))
+            ]
+
+            live_across = [
+                self.get_reg(s)
+                for s in self.syms
+                if s.id not in arg_ids and s.first < call.moment < s.last
+            ]
+
+            base = max(neighbours + live_across, default=-1) + 1
+
+            for i, sym in enumerate(args):
+                # the window moves the argument for good
+                if sym.uses != 1:
+                    raise ValueError(
+                        f"{sym} is still read after `{call}`, so it can't "
+                        "be passed in a register window"
+                    )
+
+                self.colours[self.vertex(sym)] = base + i
+
+            expr.base = base
+
+    def get_reg(self, sym: Sym) -> int:
+        return self.colours[self.vertex(sym)]
+
+
+class LinearScan:
+    def __init__(self, syms: List[Sym], copies: Optional[List[Copy]]=None):
+        self.regs: Dict[int, int] = {}
+        self.reg_count: int = 0
+
+        # the symbols each symbol would like to share a register with
+        self.partners: Dict[int, List[int]] = {}
+
+        for dest, src in copies if copies is not None else []:
+            self.partners.setdefault(dest.id, []).append(src.id)
+            self.partners.setdefault(src.id, []).append(dest.id)
+
+        assert all(s.lifetime is not None for s in syms)
+
+        self.assign_registers(syms)
+
+    def assign_registers(self, syms: List[Sym]):
+        # in straight-line SSA, every symbol is live over one interval, so
+        # a register can be reused as soon as the interval holding it ends
+        intervals = sorted(syms, key=lambda s: (s.first, s.id))
+
+        # (last moment, first moment, register) of every interval still
+        # holding one
+        active: List[Tuple[int, int, int]] = []
+        free: List[int] = []
+
+        for sym in intervals:
+            first = sym.first
+
+            # lifetimes that merely touch don't intersect, see
+            # `Lifetime.intersects_with`
+            while active != [] and active[0][:2] < (first, first):
+                _, _, reg = heapq.heappop(active)
+                heapq.heappush(free, reg)
+
+            hint = self.hint(sym, free)
+
+            if hint is not None:
+                # the interval simply carries on from a copy it's related
+                # to, which merges the two
+                free.remove(hint)
+                heapq.heapify(free)
+
+                reg = hint
+            elif free != []:
+                reg = heapq.heappop(free)
+            else:
+                reg = self.reg_count
+                self.reg_count += 1
+
+            self.regs[sym.id] = reg
+
+            last = sym.last
+            assert last is not None
+
+            heapq.heappush(active, (last, first, reg))
+
+    def hint(self, sym: Sym, free: List[int]) -> Optional[int]:
+        # a partner's register is only free once its interval is over, so
+        # taking it never makes the two interfere
+        return next(
+            (
+                self.regs[p]
+                for p in self.partners.get(sym.id, [])
+                if p in self.regs and self.regs[p] in free
+            ),
+            None
+        )
 
     def get_reg(self, sym: Sym) -> int:
-        return self.regs[sym.full_name].reg
+        return self.regs[sym.id]
+
+
+type Allocation = InterferenceGraph | LinearScan
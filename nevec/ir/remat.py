@@ -0,0 +1,100 @@
+import copy
+
+from typing import Dict, List
+
+from nevec.ir.ir import *
+
+class Remat:
+    # constants that take a single instruction to recompute--table
+    # literals get written to, so every use needs the same one
+    CHEAP = (IInt, IFloat, IBool, IStr, INil)
+
+    def __init__(self, syms: Syms):
+        self.syms: Syms = syms
+
+        # how many copies of constants were added
+        self.copies: int = 0
+
+    @staticmethod
+    def is_cheap(tac: Tac) -> bool:
+        return isinstance(tac.expr, Remat.CHEAP) and tac.sym.uses > 0
+
+    def rematerialize(self, ir: List[Tac]) -> List[Tac]:
+        # every cheap constant is held back until it's needed and emitted
+        # right before each of its users instead, so that it never has to
+        # stay in a register across anything else.  moments are left for
+        # liveness to work out again
+        held: Dict[int, Tac] = {}
+        emitted: Dict[int, bool] = {}
+
+        result: List[Tac] = []
+
+        for tac in ir:
+            if Remat.is_cheap(tac):
+                held[tac.sym.id] = tac
+                emitted[tac.sym.id] = False
+
+                continue
+
+            # a user that reads a constant twice only needs it once
+            copies: Dict[int, Tac] = {}
+
+            for sym in tac.used_syms():
+                definition = held.get(sym.id)
+
+                if definition is None or sym.id in copies:
+                    continue
+
+                if not emitted[sym.id]:
+                    emitted[sym.id] = True
+                    copies[sym.id] = definition
+                else:
+                    copies[sym.id] = self.copy(definition)
+
+                result.append(copies[sym.id])
+
+            self.redirect(tac, copies)
+
+            result.append(tac)
+
+        return result
+
+    def copy(self, definition: Tac) -> Tac:
+        original = definition.sym
+        sym = self.syms.new_sym_like(original)
+
+        self.copies += 1
+
+        return Tac(sym, copy.copy(definition.expr), definition.loc)
+
+    def redirect(self, user: Tac, copies: Dict[int, Tac]):
+        if isinstance(user.expr, IOp):
+            sym = user.expr.sym
+            definition = copies.get(sym.id)
+
+            if definition is None or definition.sym is sym:
+                return
+
+            sym.uses -= 1
+            definition.sym.uses += 1
+
+            user.expr.sym = definition.sym
+            user.sym = definition.sym
+
+            return
+
+        for operand in user.expr.operands():
+            definition = copies.get(operand.sym.id)
+
+            if definition is None or definition.sym is operand.sym:
+                continue
+
+            operand.sym.uses -= 1
+            definition.sym.uses += 1
+
+            operand.sym = definition.sym
+            operand.expr = definition.expr
+
+        # table sets are compiled with their key as the destination
+        if isinstance(user.expr, TableSet):
+            user.sym = user.expr.key.sym
@@ -0,0 +1,163 @@
+import heapq
+
+from typing import Dict, List, Set, Tuple
+
+from nevec.ir.ir import *
+
+class RegisterFileTooSmall(Exception):
+    pass
+
+
+class Spills:
+    # operands are encoded as a single byte each
+    MAX_REGS = 256
+
+    # enough scratch registers to reload both operands of a binary op, plus
+    # one register left over to allocate
+    MIN_SCRATCH = 2
+    MIN_REGS = MIN_SCRATCH + 1
+
+    def __init__(
+        self,
+        syms: List[Sym],
+        ir: List[Tac],
+        max_regs: int=MAX_REGS
+    ):
+        self.max_regs: int = max_regs
+
+        # the most symbols ever alive at once, before spilling any
+        self.peak: int = Spills.pressure(syms)
+
+        # the memory slot of every spilled symbol, keyed by symbol id
+        self.slots: Dict[int, int] = {}
+
+        # registers at the very top of the file, reserved for reloading
+        # spilled operands and for results that get spilled right away
+        self.scratch: int = 0
+
+        self.kept: List[Sym] = sorted(syms, key=lambda s: (s.first, s.id))
+
+        if self.peak > max_regs:
+            self.choose(syms, ir)
+
+    @staticmethod
+    def pressure(syms: List[Sym]) -> int:
+        # (last moment, first moment) of every symbol alive
+        lifetimes: List[Tuple[int, int]] = []
+        peak = 0
+
+        for sym in sorted(syms, key=lambda s: (s.first, s.id)):
+            first = sym.first
+
+            # see `Lifetime.intersects_with`
+            while lifetimes != [] and lifetimes[0] < (first, first):
+                heapq.heappop(lifetimes)
+
+            last = sym.last
+            assert last is not None
+
+            heapq.heappush(lifetimes, (last, first))
+            peak = max(peak, len(lifetimes))
+
+        return peak
+
+    def choose(self, syms: List[Sym], ir: List[Tac]):
+        # spilling needs scratch registers, and how many depends on what got
+        # spilled, so this settles on a number by trying again with more
+        scratch = 1
+
+        while True:
+            if scratch >= self.max_regs:
+                raise RegisterFileTooSmall(
+                    f"a register file of {self.max_regs} registers is too "
+                    "small for this program"
+                )
+
+            spilled = self.pick(syms, self.max_regs - scratch)
+            needed = self.scratch_needed(ir, spilled)
+
+            if needed <= scratch:
+                break
+
+            scratch = needed
+
+        self.scratch = scratch
+
+        self.slots = {id: slot for slot, id in enumerate(sorted(spilled))}
+        self.kept = [s for s in self.kept if s.id not in self.slots]
+
+    def pick(self, syms: List[Sym], available: int) -> Set[int]:
+        spilled: Set[int] = set()
+
+        # (last moment, first moment, id, symbol) of every symbol holding a
+        # register
+        active: List[Tuple[int, int, int, Sym]] = []
+
+        for sym in sorted(syms, key=lambda s: (s.first, s.id)):
+            first = sym.first
+
+            while active != [] and active[0][:2] < (first, first):
+                heapq.heappop(active)
+
+            last = sym.last
+            assert last is not None
+
+            heapq.heappush(active, (last, first, sym.id, sym))
+
+            if len(active) <= available:
+                continue
+
+            # `available` is at most 256, so a linear search is fine here
+            victim = min(active, key=lambda a: Spills.cost(a[3]))
+
+            active.remove(victim)
+            heapq.heapify(active)
+
+            spilled.add(victim[2])
+
+        return spilled
+
+    @staticmethod
+    def cost(sym: Sym) -> Tuple[float, int]:
+        last = sym.last
+        assert last is not None
+
+        # every use costs a reload and the definition costs a spill, while
+        # the whole lifetime is freed up in exchange; ties go to whichever
+        # lives the longest
+        length = last - sym.first + 1
+
+        return (sym.uses + 1) / length, -last
+
+    def scratch_needed(self, ir: List[Tac], spilled: Set[int]) -> int:
+        needed = 0
+
+        for tac in ir:
+            reloads = len(set(
+                s.id
+                for s in tac.used_syms()
+                if s.id in spilled
+            ))
+
+            # results are written after every operand is read, so they can
+            # share a scratch register with a reloaded operand
+            spills_result = tac.defines() and tac.sym.id in spilled
+
+            needed = max(needed, reloads, int(spills_result))
+
+        return needed
+
+    def is_spilled(self, sym: Sym) -> bool:
+        return sym.id in self.slots
+
+    def slot_of(self, sym: Sym) -> int:
+        return self.slots[sym.id]
+
+    def scratch_reg(self, i: int) -> int:
+        return self.max_regs - self.scratch + i
+
+    def available(self) -> int:
+        return self.max_regs - self.scratch
+
+    def __len__(self) -> int:
+        return len(self.slots)
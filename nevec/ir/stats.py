@@ -0,0 +1,146 @@
+import heapq
+import json
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from nevec.ir.reg import Allocation
+from nevec.ir.spill import Spills
+from nevec.ir.sym import Sym
+
+def interferences(syms: List[Sym]) -> Iterator[Tuple[Sym, Sym]]:
+    # the allocators' sweep, going through every intersecting pair of
+    # lifetimes once--see `Lifetime.intersects_with`
+    active: List[Tuple[int, int, int, Sym]] = []
+
+    for sym in sorted(syms, key=lambda s: (s.first, s.id)):
+        first = sym.first
+
+        last = sym.last
+        assert last is not None
+
+        while active != [] and active[0][:2] < (first, first):
+            heapq.heappop(active)
+
+        for _, _, _, other in active:
+            yield other, sym
+
+        heapq.heappush(active, (last, first, sym.id, sym))
+
+class RegallocStats:
+    def __init__(
+        self,
+        syms: List[Sym],
+        allocation: Allocation,
+        spills: Spills,
+        elapsed: float
+    ):
+        kept = spills.kept
+
+        self.vertices: int = len(kept)
+        self.edges: int = sum(1 for _ in interferences(kept))
+
+        # lifetimes make an interval graph, whose biggest clique is just
+        # the most symbols alive at once
+        self.max_clique: int = Spills.pressure(kept)
+
+        self.registers: int = 1 + max(
+            (allocation.get_reg(s) for s in kept),
+            default=-1
+        )
+
+        self.scratch: int = spills.scratch
+        self.spills: int = len(spills)
+        self.peak: int = Spills.pressure(syms)
+
+        self.elapsed: float = elapsed
+
+    def __repr__(self) -> str:
+        scratch = f" (+{self.scratch} scratch)" if self.scratch > 0 else ""
+
+        lines = [
+            ("vertices", str(self.vertices)),
+            ("edges", str(self.edges)),
+            ("max clique", str(self.max_clique)),
+            ("registers", f"{self.registers}{scratch}"),
+            ("spills", f"{self.spills} (peak pressure {self.peak})"),
+            ("time", f"{self.elapsed * 1000:.2f}ms")
+        ]
+
+        return "\n".join(
+            # functions allocate their own registers, see `Fun.allocate`,
+            # and aren't counted here
+            ["register allocation (top-level code only):"] +
+            [f"  {name + ':':<12}{value}" for name, value in lines]
+        )
+
+
+class RegallocDump:
+    # what `--regalloc-dump` can write, going by the file's extension
+    FORMATS = (".dot", ".json")
+
+    def __init__(
+        self,
+        syms: List[Sym],
+        allocation: Allocation,
+        spills: Spills
+    ):
+        self.syms: List[Sym] = syms
+        self.allocation: Allocation = allocation
+        self.spills: Spills = spills
+
+    def reg_of(self, sym: Sym) -> Optional[int]:
+        if self.spills.is_spilled(sym):
+            return None
+
+        return self.allocation.get_reg(sym)
+
+    def to_json(self) -> str:
+        intervals: List[Dict] = [
+            {
+                "sym": s.full_name,
+                "first": s.first,
+                "last": s.last,
+                "reg": self.reg_of(s),
+                "slot": (
+                    self.spills.slot_of(s)
+                    if self.spills.is_spilled(s)
+                    else None
+                )
+            }
+            for s in self.syms
+        ]
+
+        edges = [
+            [a.full_name, b.full_name]
+            for a, b in interferences(self.syms)
+        ]
+
+        return json.dumps({"intervals": intervals, "edges": edges}, indent=2)
+
+    def to_dot(self) -> str:
+        lines = ["graph interference {", "  node [shape=box];"]
+
+        for sym in self.syms:
+            reg = self.reg_of(sym)
+            where = f"r{reg}" if reg is not None else "spilled"
+
+            # spilled symbols are still drawn, since they're what pushed
+            # the pressure up in the first place
+            style = ", style=dashed" if reg is None else ""
+
+            label = f"{sym.full_name}\\n{where}\\n{sym.lifetime}"
+
+            lines.append(f"  {sym.full_name} [label=\"{label}\"{style}];")
+
+        for a, b in interferences(self.syms):
+            lines.append(f"  {a.full_name} -- {b.full_name};")
+
+        lines.append("}")
+
+        return "\n".join(lines)
+
+    def write(self, path: str):
+        text = self.to_dot() if path.endswith(".dot") else self.to_json()
+
+        with open(path, "w") as f:
+            f.write(text + "\n")
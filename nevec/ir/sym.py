@@ -1,3 +1,4 @@
+from array import array
 from typing import List, Dict, Optional, Self, Tuple
 
 type Moment = int
@@ -10,69 +11,139 @@ class Lifetime:
     def intersects_with(self, other: Self) -> bool:
         assert self.last is not None and other.last is not None
 
-        return (
-            other.first < self.last and other.last > self.first
+        # an instruction reads its operands before it writes its result,
+        # so a lifetime ending right where another starts can hand its
+        # register over--but two symbols written at once always clash,
+        # even if nothing ever reads them
+        return self.first == other.first or (
+            other.first < self.last and self.first < other.last
         )
     
     def is_valid_in(self, moment: Moment) -> bool:
         assert self.last is not None
 
-        return self.first >= moment and self.last <= moment
+        return self.first <= moment <= self.last
 
     def __repr__(self) -> str:
         return f"({self.first}, {self.last})"
 
 
 class Sym[T]:
+    # symbols are created by the thousands, so they only keep what's needed
+    # to name them; their moments and use counts live in `Syms`' columns
+    __slots__ = ("table", "id", "name", "index", "value")
+
     def __init__(
         self,
+        table: "Syms",
+        id: int,
         name: str,
         index: int,
-        moment: Moment,
         value: Optional[T]=None
     ):
+        # `id` identifies the symbol; `name` and `index` only exist for
+        # displaying it
+        self.table: Syms = table
+        self.id: int = id
         self.name: str = name
         self.index: int = index
-        self.first: Moment = moment
 
         self.value: Optional[T] = value
 
-        self.full_name = self.name + str(self.index)
-        self.uses: int = 0
+    @property
+    def full_name(self) -> str:
+        return self.name + str(self.index)
+
+    @property
+    def column(self) -> int:
+        # -1 would quietly index the last symbol's columns
+        if self.id == Syms.NO_SYM:
+            raise ValueError(
+                f"{self.full_name} was cleaned up, and has no columns left"
+            )
+
+        return self.id
+
+    @property
+    def first(self) -> Moment:
+        return self.table.firsts[self.column]
 
-        self.lifetime: Optional[Lifetime] = None
+    @property
+    def last(self) -> Optional[Moment]:
+        last = self.table.lasts[self.column]
 
-    def rename(self, after: Self):
-        self.index = after.index + 1
-        self.full_name = self.name + str(self.index)
+        return last if last != Syms.NO_MOMENT else None
 
-    def propagate(self):
-        self.uses -= 1
+    @property
+    def uses(self) -> int:
+        return self.table.uses[self.column]
+
+    @uses.setter
+    def uses(self, uses: int):
+        self.table.uses[self.column] = uses
+
+    @property
+    def lifetime(self) -> Optional[Lifetime]:
+        last = self.last
+
+        if last is None:
+            return None
+
+        return Lifetime(self.first, last)
+
+    def rename(self, index: int):
+        self.index = index
 
     def last_used(self, last: Moment):
-        self.uses += 1
+        column = self.column
+
+        self.table.uses[column] += 1
 
-        self.lifetime = Lifetime(self.first, last)
+        # uses don't always come in order, and an earlier one mustn't cut
+        # the lifetime short
+        self.table.lasts[column] = max(self.table.lasts[column], last)
 
     def is_alive_in(self, moment: Moment) -> bool:
-        assert self.lifetime is not None
+        lifetime = self.lifetime
 
-        return self.lifetime.is_valid_in(moment)
+        assert lifetime is not None
+
+        return lifetime.is_valid_in(moment)
 
     def copy(self) -> "Sym":
-        return Sym(
-            self.name,
-            self.index,
-            self.first
-        )
+        # a detached copy, with the same name and first moment but no uses
+        # and no lifetime yet; it gets a table of its own, so nothing it does
+        # shows up in this one.  see `Syms.new_sym_like` for a new symbol
+        table = Syms()
+        table.firsts.append(self.first)
+        table.lasts.append(Syms.NO_MOMENT)
+        table.uses.append(0)
+
+        sym = Sym(table, 0, self.name, self.index)
+        table.syms.append(sym)
+
+        return sym
 
     def __repr__(self) -> str:
         return self.full_name
 
 
 class Syms:
+    NO_MOMENT = -1
+    NO_SYM = -1
+
     def __init__(self):
-        self.syms: Dict[str, Sym] = {}
+        # indexed by symbol id, and so are all the columns below
+        self.syms: List[Sym] = []
+
+        self.firsts: array[int] = array("i")
+        self.lasts: array[int] = array("i")
+        self.uses: array[int] = array("i")
+
+        # the next free index for each base name, and the symbol behind each
+        # name and index
+        self.counters: Dict[str, int] = {}
+        self.named: Dict[Tuple[str, int], Sym] = {}
 
     def new_sym[T](
         self,
@@ -82,53 +153,70 @@ class Syms:
     ) -> Sym:
         name, index = self.next_available_name(name)
 
-        sym = Sym(name, index, moment, value)
+        sym = Sym(self, len(self.syms), name, index, value)
+
+        self.syms.append(sym)
+        self.named[name, index] = sym
 
-        self.syms[sym.full_name] = sym
+        self.firsts.append(moment)
+        self.lasts.append(Syms.NO_MOMENT)
+        self.uses.append(0)
 
         return sym
 
-    def next_available_name(self, name: str, index: int=0) -> Tuple[str, int]:
-        full_name = name + str(index)
+    def new_sym_like(self, sym: Sym) -> Sym:
+        return self.new_sym(sym.first, sym.name, sym.value)
 
-        if full_name not in self.syms.keys():
-            return name, index
+    def next_available_name(self, name: str) -> Tuple[str, int]:
+        index = self.counters.get(name, 0)
+        self.counters[name] = index + 1
 
-        return self.next_available_name(name, index + 1)
+        return name, index
 
     def next_after(self, sym: Sym) -> Optional[Sym]:
-        index = sym.index + 1
+        return self.named.get((sym.name, sym.index + 1))
 
-        next_name = f"{sym.name}{index}"
+    def cleanup(self, renumber: bool=True):
+        alive = [s for s in self.syms if s.uses > 0]
 
-        return self.syms.get(next_name)
+        # whatever still holds on to a dead symbol must not be able to read
+        # some other symbol's columns through it--see `Sym.column`
+        for sym in self.syms:
+            if sym.uses <= 0:
+                sym.id = Syms.NO_SYM
 
-    def cleanup(self):
-        def give_new_name(syms: Dict[str, Sym], current: Sym) -> Sym:
-            found = next(
-                (
-                    s 
-                    for s in reversed(syms.values())
-                    if s.name == current.name
-                ),
-                Sym(current.name, -1, current.first)
-            )
+        firsts = array("i", (s.first for s in alive))
+        lasts = array("i", (self.lasts[s.id] for s in alive))
+        uses = array("i", (s.uses for s in alive))
+
+        # ids stay dense, so every id keeps being a valid column index
+        for id, sym in enumerate(alive):
+            sym.id = id
 
-            current.rename(after=found)
-            
-            return current
+        self.syms = alive
+        self.named = {(s.name, s.index): s for s in alive}
 
-        def add_to(syms: Dict[str, Sym], sym: Sym):
-            new_sym = give_new_name(syms, sym)
-            syms[new_sym.full_name] = new_sym
+        self.firsts = firsts
+        self.lasts = lasts
+        self.uses = uses
 
-        self.syms = {n: s for n, s in self.syms.items() if s.uses > 0}
+        if renumber:
+            self.renumber()
 
-        new_syms = {}
+    def renumber(self):
+        # numbers every name from 0 again, without any gaps, in the order
+        # the symbols were created
+        self.counters = {}
+        self.named = {}
 
-        list(map(lambda s: add_to(new_syms, s), self.syms.values()))
+        for sym in self.syms:
+            _, index = self.next_available_name(sym.name)
+            sym.rename(index)
 
-        self.syms = new_syms
+            self.named[sym.name, index] = sym
 
     def values(self) -> List[Sym]:
-        return list(self.syms.values())
+        return list(self.syms)
+
+    def __len__(self) -> int:
+        return len(self.syms)
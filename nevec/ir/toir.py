@@ -1,3 +1,6 @@
+from functools import partial, reduce
+from typing import Callable
+
 from nevec.ast.ast import *
 from nevec.ast.visit import Visit
 
@@ -5,14 +8,28 @@ from nevec.ir.ir import *
 from nevec.ir.reg import *
 from nevec.ir.val import Val
 
-class ToIr(Visit[Ast, Tac]):
+from nevec.ctx.ctx import CompilationContext
+
+# either a node still to be lowered or a step that combines the Tacs its
+# children left on the value stack
+type Work = Ast | Callable[[], None]
+
+class ToIr(Visit[Ast, None]):
     DIGITS = "1234567890"
 
-    def __init__(self):
+    def __init__(self, ctx: CompilationContext):
+        self.ctx: CompilationContext = ctx
+
         self.syms: Syms = Syms()
 
         self.ops: List[Tac] = []
 
+        # lowering runs off an explicit stack rather than the call stack, so
+        # that deeply nested expressions don't hit the recursion limit.
+        # every node leaves exactly one Tac on `vals` once it's done
+        self.work: List[Work] = []
+        self.vals: List[Tac] = []
+
     def new_sym[T](
         self,
         moment: Optional[Moment]=None,
@@ -30,207 +47,177 @@ class ToIr(Visit[Ast, Tac]):
         if not isinstance(ast, Program):
             raise ValueError("Ast must begin with a Program node")
 
-        self.visit(ast)
+        self.lower(ast)
 
         return self.ops
 
-    def visit_Program(self, program: Program) -> Tac:
-        expr = self.visit(program.expr)
+    def lower(self, ast: Ast) -> Tac:
+        self.work.append(ast)
 
-        ret = IRet(
-            expr.sym,
-            expr.loc
-        )
+        while self.work:
+            item = self.work.pop()
 
-        expr.sym.last_used(self.next_moment())
+            if isinstance(item, Ast):
+                self.visit(item)
+            else:
+                item()
 
-        tac = Tac(
-            ret.sym,
-            ret,
-            expr.loc
-        )
+        return self.vals.pop()
 
+    def then(self, *items: Work):
+        self.work.extend(reversed(items))
+
+    def push(self, tac: Tac):
         self.ops.append(tac)
-        return tac
+        self.vals.append(tac)
 
-    def visit_Parens(self, parens: Parens) -> Tac: 
-        return self.visit(parens.expr)
+    def pop_many(self, count: int) -> List[Tac]:
+        if count == 0:
+            return []
 
-    def visit_UnOp(self, un_op: UnOp) -> Tac:
-        operand = self.visit(un_op.expr)
-        
-        expr = IUnOp(
-            IUnOp.Op(un_op.op.value),
-            operand.operand(),
+        tacs = self.vals[-count:]
+        del self.vals[-count:]
 
-            un_op.loc,
-            un_op.type
-        )
+        return tacs
 
+    def combine(self, expr: IExpr, *operands: Tac):
         moment = self.next_moment()
-        operand.sym.last_used(moment)
-
-        tac = Tac(
-            self.new_sym(moment),
-            expr,
-            expr.loc
-        )
 
-        self.ops.append(tac)
-        return tac
+        sym = self.new_sym(moment)
 
-    def visit_Bitwise(self, bitwise: Bitwise) -> Tac:
-        left = self.visit(bitwise.left)
-        right = self.visit(bitwise.right)
+        for operand in operands:
+            operand.sym.last_used(moment)
 
-        op_lexeme = bitwise.tok.lexeme
+        self.push(Tac(
+            sym,
+            expr,
+            expr.loc
+        ))
 
-        expr = IBinOp(
-            left.operand(),
-            IBinOp.Op(bitwise.op.value),
-            right.operand(),
+    def visit_Program(self, program: Program):
+        self.then(program.expr, self.finish_program)
 
-            op_lexeme,
+    def finish_program(self):
+        expr = self.vals.pop()
 
-            bitwise.loc,
-            bitwise.type,
+        ret = IRet(
+            expr.sym,
+            expr.loc
         )
 
-        moment = self.next_moment()
-
-        left.sym.last_used(moment)
-        right.sym.last_used(moment)
+        expr.sym.last_used(self.next_moment())
 
         tac = Tac(
-            self.new_sym(moment),
-            expr,
+            ret.sym,
+            ret,
             expr.loc
         )
 
-        self.ops.append(tac)
-        return tac
+        self.push(tac)
 
-    def visit_Comparison(self, comparison: Comparison) -> Tac:
-        left = self.visit(comparison.left)
-        right = self.visit(comparison.right)
+    def visit_Parens(self, parens: Parens):
+        self.then(parens.expr)
 
-        op_lexeme = comparison.tok.lexeme
+    def visit_UnOp(self, un_op: UnOp):
+        self.then(un_op.expr, lambda: self.finish_un_op(un_op))
 
-        expr = IBinOp(
-            left.operand(),
-            IBinOp.Op(comparison.op.value),
-            right.operand(),
+    def finish_un_op(self, un_op: UnOp):
+        operand = self.vals.pop()
 
-            op_lexeme,
+        expr = IUnOp(
+            IUnOp.Op(un_op.op.value),
+            operand.operand(),
 
-            comparison.loc,
-            comparison.type,
+            un_op.loc,
+            un_op.type
         )
 
-        moment = self.next_moment()
+        self.combine(expr, operand)
 
-        left.sym.last_used(moment)
-        right.sym.last_used(moment)
+    def visit_Bitwise(self, bitwise: Bitwise):
+        self.bin_op(bitwise)
 
-        tac = Tac(
-            self.new_sym(moment),
-            expr,
-            expr.loc
-        )
+    def visit_Comparison(self, comparison: Comparison):
+        self.bin_op(comparison)
 
-        self.ops.append(tac)
-        return tac
+    def visit_Arith(self, arith: Arith):
+        self.bin_op(arith)
+
+    def bin_op(self, bin_op: BinOp):
+        self.then(
+            bin_op.left,
+            bin_op.right,
+            lambda: self.finish_bin_op(bin_op)
+        )
 
-    def visit_Arith(self, arith: Arith) -> Tac:
-        left = self.visit(arith.left)
-        right = self.visit(arith.right)
+    def finish_bin_op(self, bin_op: BinOp):
+        left, right = self.pop_many(2)
 
-        op_lexeme = arith.tok.lexeme
+        op_lexeme = bin_op.tok.lexeme
 
         expr = IBinOp(
             left.operand(),
-            IBinOp.Op(arith.op.value),
+            IBinOp.Op(bin_op.op.value),
             right.operand(),
 
             op_lexeme,
 
-            arith.loc,
-            arith.type,
+            bin_op.loc,
+            bin_op.type,
         )
 
-        moment = self.next_moment()
-
-        left.sym.last_used(moment)
-        right.sym.last_used(moment)
+        self.combine(expr, left, right)
 
-        tac = Tac(
-            self.new_sym(moment),
-            expr,
-            expr.loc
+    def visit_Concat(self, concat: Concat):
+        self.then(
+            concat.left,
+            concat.right,
+            lambda: self.finish_concat(concat.loc, concat.type)
         )
 
-        self.ops.append(tac)
-        return tac
-
-    def visit_Concat(self, concat: Concat) -> Tac:
-        left = self.visit(concat.left)
-        right = self.visit(concat.right)
+    def finish_concat(self, loc: Loc, type: Type):
+        left, right = self.pop_many(2)
 
         expr = IConcat(
             left.operand(),
             right.operand(),
 
-            concat.loc,
-            concat.type,
+            loc,
+            type,
         )
 
-        moment = self.next_moment()
-
-        left.sym.last_used(moment)
-        right.sym.last_used(moment)
-
-        tac = Tac(
-            self.new_sym(moment),
-            expr,
-            expr.loc
-        )
+        self.combine(expr, left, right)
 
-        self.ops.append(tac)
-        return tac
+    def visit_Show(self, show: Show):
+        self.then(show.expr, lambda: self.finish_show(show.loc))
 
-    def visit_Show(self, show: Show) -> Tac:
-        operand = self.visit(show.expr)
+    def finish_show(self, loc: Loc):
+        operand = self.vals.pop()
 
         expr = IUnOp(
             IUnOp.Op.SHOW,
             operand.operand(),
-            show.loc,
-            show.type
-        )
-
-        moment = self.next_moment()
-
-        sym = self.new_sym(moment)
-
-        operand.sym.last_used(moment)
-
-        tac = Tac(
-            sym,
-            expr,
-            expr.loc
+            loc,
+            Types.STR
         )
 
-        self.ops.append(tac)
-        return tac
+        self.combine(expr, operand)
 
-    def visit_Table(self, table: Table) -> Tac:
+    def visit_Table(self, table: Table):
         expr = ITable.empty(table.loc, table.type)
 
         tac = Tac(self.new_sym(), expr, expr.loc)
         self.ops.append(tac)
 
-        keys = [self.visit(k) for k in table.keys]
-        vals = [self.visit(v) for v in table.vals]
+        self.then(
+            *table.keys,
+            *table.vals,
+            lambda: self.finish_table(table, tac)
+        )
+
+    def finish_table(self, table: Table, tac: Tac):
+        vals = self.pop_many(len(table.vals))
+        keys = self.pop_many(len(table.keys))
 
         exprs = list(map(
             lambda i: TableSet(
@@ -241,7 +228,7 @@ class ToIr(Visit[Ast, Tac]):
                 table.type,
                 table.loc
             ),
-            range(len(table.keys)) 
+            range(len(table.keys))
         ))
 
         tacs = [
@@ -249,141 +236,154 @@ class ToIr(Visit[Ast, Tac]):
             for e in exprs
         ]
 
-        list(map(self.ops.append, tacs)) 
+        list(map(self.ops.append, tacs))
 
         moment = self.next_moment()
 
         # i'm truly sorry about all this
         list(map(
-            lambda i: keys[i].sym.last_used(moment - len(keys) + i), 
+            lambda i: keys[i].sym.last_used(moment - len(keys) + i),
             range(len(keys))
         ))
 
         list(map(
-            lambda i: vals[i].sym.last_used(moment - len(keys) + i), 
+            lambda i: vals[i].sym.last_used(moment - len(keys) + i),
             range(len(vals))
         ))
 
         tac.sym.uses += len(keys)
 
-        return tac
+        self.vals.append(tac)
 
-    def visit_Int(self, i: Int) -> Tac:
-        expr = IInt(
-            i.value,
-            i.loc,
-            i.type,
-        )
-
-        sym = self.new_sym(value=i.value)
+    def const(self, expr: IConst, value):
+        sym = self.new_sym(value=value)
 
-        tac = Tac(
+        self.push(Tac(
             sym,
             expr,
             expr.loc
+        ))
+
+    def visit_Int(self, i: Int):
+        expr = IInt(
+            i.value,
+            i.loc,
+            i.type,
         )
 
-        self.ops.append(tac)
-        return tac
+        self.const(expr, i.value)
 
-    def visit_Float(self, f: Float) -> Tac:
+    def visit_Float(self, f: Float):
         expr = IFloat(
             f.value,
             f.loc,
             f.type,
         )
 
-        sym = self.new_sym(value=f.value)
+        self.const(expr, f.value)
 
-        tac = Tac(
-            sym,
-            expr,
-            expr.loc
-        )
-
-        self.ops.append(tac)
-        return tac
-
-    def visit_Bool(self, b: Bool) -> Tac:
+    def visit_Bool(self, b: Bool):
         expr = IBool(
             b.value,
             b.loc,
         )
 
-        sym = self.new_sym(value=b.value)
+        self.const(expr, b.value)
 
-        tac = Tac(
-            sym,
-            expr,
-            expr.loc
-        )
-
-        self.ops.append(tac)
-        return tac
-
-    def visit_Str(self, s: Str) -> Tac:
+    def visit_Str(self, s: Str):
         expr = IStr(
             s.value,
             s.loc,
             s.type,
         )
 
-        sym = self.new_sym(value=s.value)
+        self.const(expr, s.value)
 
-        tac = Tac(
-            sym,
-            expr,
-            expr.loc
-        )
+    def visit_Interpol(self, interpol: Interpol):
+        # the whole chain of segments becomes a single n-ary concat, instead
+        # of two binary concats--and two intermediate strings--per segment
+        parts: List[Work] = []
+        types: List[Type] = []
 
-        self.ops.append(tac)
-        return tac
+        segments: List[Interpol | Str] = [interpol]
 
-    def visit_Interpol(self, interpol: Interpol) -> Tac:
-        synthetic_str = Str(interpol.left, interpol.loc)
+        while segments:
+            segment = segments.pop()
 
-        synthetic_show = Show(
-            interpol.expr,
-            interpol.expr.loc
-        )
+            if isinstance(segment, Str):
+                if segment.value != "":
+                    parts.append(segment)
+                    types.append(segment.type)
 
-        expr = interpol.expr
-        if not interpol.expr.type.is_str():
-            expr = synthetic_show
+                continue
 
-        synthetic_first_concat = Concat(
-            synthetic_str,
-            BinOp.Op.CONCAT,
-            expr,
+            if segment.left != "":
+                parts.append(partial(self.str_part, segment.left, segment.loc))
+                types.append(Str.type_of(segment.left))
 
-            Tok.eof(),
-            interpol.loc.union_hull(interpol.expr.loc)
-        )
+            expr = segment.expr
 
-        synthetic_second_concat = Concat(
-            synthetic_first_concat,
-            BinOp.Op.CONCAT,
-            interpol.next, 
+            # nested interpolations are spliced right into this one
+            if isinstance(expr, Interpol):
+                segments.extend([segment.next, expr])
+                continue
 
-            Tok.eof(),
-            synthetic_first_concat.loc.union_hull(interpol.next.loc)
-        )
+            parts.append(expr)
 
-        return self.visit(synthetic_second_concat)
+            if expr.type.is_str():
+                types.append(expr.type)
+            else:
+                parts.append(partial(self.finish_show, expr.loc))
+                types.append(Types.STR)
 
-    def visit_Nil(self, nil: Nil) -> Tac:
-        expr = INil(
-            nil.loc
+            segments.append(segment.next)
+
+        if len(types) == 1:
+            self.then(*parts)
+            return
+
+        type = reduce(Concat.type_of, types)
+
+        self.then(
+            *parts,
+            lambda: self.finish_concat_n(len(types), interpol.loc, type)
+        )
+
+    def str_part(self, value: str, loc: Loc):
+        expr = IStr(
+            value,
+            loc,
+            Str.type_of(value)
         )
 
-        sym = self.new_sym(value=Val.Nil())
+        self.const(expr, value)
 
-        tac = Tac(
-            sym,
-            expr,
-            expr.loc
+    def finish_concat_n(self, count: int, loc: Loc, type: Type):
+        parts = self.pop_many(count)
+
+        # longer chains are concatenated in chunks, each chunk feeding
+        # into the next one
+        while len(parts) > IConcatN.MAX_PARTS:
+            chunk = parts[:IConcatN.MAX_PARTS]
+
+            self.combine(
+                IConcatN([p.operand() for p in chunk], loc, type),
+                *chunk
+            )
+
+            parts = [self.vals.pop(), *parts[IConcatN.MAX_PARTS:]]
+
+        expr = IConcatN(
+            [p.operand() for p in parts],
+            loc,
+            type
         )
 
-        self.ops.append(tac)
-        return tac
+        self.combine(expr, *parts)
+
+    def visit_Nil(self, nil: Nil):
+        expr = INil(
+            nil.loc
+        )
 
+        self.const(expr, Val.Nil())
@@ -0,0 +1,252 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from nevec.ir.cfg import Block, Cfg
+from nevec.ir.ir import *
+
+class MalformedIr(ValueError):
+    pass
+
+
+class Verify:
+    def __init__(self, syms: Syms, debug: bool=False):
+        self.syms: Syms = syms
+
+        # the debug mode re-derives everything by brute force instead of
+        # trusting any bookkeeping, which makes it quadratic
+        self.debug: bool = debug
+
+        self.stage: str = "lowering"
+
+    def verify(
+        self,
+        ir: List[Tac],
+        stage: str="lowering",
+        uses_of: Optional[Callable[[Sym], int]]=None
+    ):
+        # `uses_of` is whatever is meant to know the use counts, if it isn't
+        # `Syms` itself
+        self.stage = stage
+
+        self.check(ir, uses_of)
+
+        if self.debug:
+            self.check_thoroughly(ir, uses_of)
+
+    def fail(self, msg: str, tac: Optional[Tac]=None):
+        where = f" in `{tac}`" if tac is not None else ""
+
+        raise MalformedIr(f"malformed IR after {self.stage}: {msg}{where}")
+
+    def check(
+        self,
+        ir: List[Tac],
+        uses_of: Optional[Callable[[Sym], int]]=None
+    ):
+        defs: Dict[int, Tac] = {}
+        uses: Dict[int, int] = {}
+
+        for tac in ir:
+            for sym in tac.used_syms():
+                self.check_sym(sym, tac)
+
+                # in straight-line code, a definition dominates every use
+                # that comes after it--see `verify_cfg` for the rest
+                if sym.id not in defs:
+                    self.fail(f"{sym} is used before it is defined", tac)
+
+                uses[sym.id] = uses.get(sym.id, 0) + 1
+
+                self.check_lifetime(sym, tac)
+
+            if not tac.defines():
+                continue
+
+            self.check_sym(tac.sym, tac)
+
+            if tac.sym.id in defs:
+                self.fail(f"{tac.sym} is defined more than once", tac)
+
+            defs[tac.sym.id] = tac
+
+        for sym in self.syms.syms:
+            found = uses.get(sym.id, 0)
+            counted = uses_of(sym) if uses_of is not None else sym.uses
+
+            if counted != found:
+                self.fail(f"{sym} counts {counted} uses, but has {found}")
+
+    def verify_cfg(self, cfg: Cfg, stage: str="lowering"):
+        self.stage = stage
+
+        cfg.compute_doms()
+
+        # the block each symbol is defined in, and where in that block
+        defs: Dict[int, Tuple[Block, int]] = {}
+        uses: Dict[int, int] = {}
+
+        for block in cfg.order:
+            for i, tac in enumerate(block.all_tacs()):
+                if not tac.defines():
+                    continue
+
+                self.check_sym(tac.sym, tac)
+
+                if tac.sym.id in defs:
+                    self.fail(f"{tac.sym} is defined more than once", tac)
+
+                defs[tac.sym.id] = (block, i)
+
+        for block in cfg.order:
+            tacs = block.all_tacs()
+
+            for i, tac in enumerate(tacs):
+                # a phi reads each operand at the very end of the
+                # predecessor it comes from
+                uses_at = (
+                    [
+                        (o.sym, cfg.blocks[b], len(cfg.blocks[b].all_tacs()))
+                        for b, o in tac.expr.incoming
+                    ]
+                    if isinstance(tac.expr, Phi)
+                    else [(s, block, i) for s in tac.used_syms()]
+                )
+
+                for sym, at, position in uses_at:
+                    self.check_dominated(cfg, defs, sym, at, position, tac)
+
+                    uses[sym.id] = uses.get(sym.id, 0) + 1
+
+            if block.cond is not None:
+                cond = block.cond
+
+                self.check_dominated(cfg, defs, cond, block, len(tacs), None)
+
+                uses[cond.id] = uses.get(cond.id, 0) + 1
+
+        for sym in self.syms.syms:
+            found = uses.get(sym.id, 0)
+
+            if sym.uses != found:
+                self.fail(f"{sym} counts {sym.uses} uses, but has {found}")
+
+    def check_dominated(
+        self,
+        cfg: Cfg,
+        defs: Dict[int, Tuple[Block, int]],
+        sym: Sym,
+        block: Block,
+        position: int,
+        user: Optional[Tac]
+    ):
+        definition = defs.get(sym.id)
+
+        if definition is None:
+            self.fail(f"{sym} is never defined", user)
+            return
+
+        def_block, def_position = definition
+
+        is_dominated = (
+            def_position < position
+            if def_block is block
+            else cfg.dominates(def_block, block)
+        )
+
+        if not is_dominated:
+            self.fail(f"{sym} isn't dominated by its definition", user)
+
+    def check_sym(self, sym: Sym, tac: Tac):
+        id = sym.id
+
+        is_live = (
+            0 <= id < len(self.syms) and
+            self.syms.syms[id] is sym
+        )
+
+        if not is_live:
+            self.fail(f"{sym} is not a live symbol", tac)
+
+    def check_lifetime(self, sym: Sym, user: Tac):
+        lifetime = sym.lifetime
+
+        if lifetime is None:
+            self.fail(f"{sym} is used, but has no lifetime", user)
+            return
+
+        assert lifetime.last is not None
+
+        if lifetime.last < lifetime.first:
+            self.fail(f"{sym} dies before it's defined: {lifetime}", user)
+
+        # `ret` and table sets don't have a moment of their own
+        if not user.defines():
+            return
+
+        if not lifetime.first < user.moment <= lifetime.last:
+            self.fail(
+                f"{sym} is used at {user.moment}, outside of {lifetime}",
+                user
+            )
+
+    def check_thoroughly(
+        self,
+        ir: List[Tac],
+        uses_of: Optional[Callable[[Sym], int]]=None
+    ):
+        for i, tac in enumerate(ir):
+            if tac.defines():
+                defs = [t for t in ir if t.defines() and t.sym is tac.sym]
+
+                if len(defs) != 1:
+                    self.fail(f"{tac.sym} is defined {len(defs)} times", tac)
+
+            for sym in tac.used_syms():
+                dominators = [
+                    t
+                    for t in ir[:i]
+                    if t.defines() and t.sym is sym
+                ]
+
+                if len(dominators) != 1:
+                    self.fail(f"{sym} isn't defined exactly once before", tac)
+
+            if not isinstance(tac.expr, IExpr):
+                continue
+
+            for operand in tac.expr.operands():
+                self.check_operand(operand, ir, tac)
+
+        for sym in self.syms.syms:
+            found = sum(
+                1
+                for t in ir
+                for s in t.used_syms()
+                if s is sym
+            )
+
+            counted = uses_of(sym) if uses_of is not None else sym.uses
+
+            if counted != found:
+                self.fail(f"{sym} counts {counted} uses, but has {found}")
+
+            is_defined = any(t.defines() and t.sym is sym for t in ir)
+
+            if found > 0 and not is_defined:
+                self.fail(f"{sym} is used, but never defined")
+
+    def check_operand(self, operand: Operand, ir: List[Tac], user: Tac):
+        definition = next(
+            (t for t in ir if t.defines() and t.sym is operand.sym),
+            None
+        )
+
+        if definition is None:
+            return
+
+        # operands point back at what they read, and passes have to keep
+        # those pointers up to date when they rewrite a definition
+        if operand.expr is not definition.expr:
+            self.fail(f"{operand} doesn't point at its definition", user)
+
+        if operand.type != definition.expr.type:
+            self.fail(f"{operand} doesn't match its definition's type", user)
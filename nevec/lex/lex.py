@@ -4,7 +4,7 @@ import emoji
 
 from typing import List, Optional
 
-from nevec.err.report import Report
+from nevec.ctx.ctx import CompilationContext
 from nevec.lex.tok import Loc, TokType, Tok
 
 class CharQueue:
@@ -36,9 +36,20 @@ class Lex:
     DIGITS = "1234567890"
     WS = " \r\t"
 
-    def __init__(self, code: str, file_name="test.neve"):
+    def __init__(
+        self,
+        code: str,
+        file_name="test.neve",
+        ctx: Optional[CompilationContext]=None
+    ):
+        self.ctx: CompilationContext = (
+            ctx
+            if ctx is not None
+            else CompilationContext(code, file_name)
+        )
+
         self.code: CharQueue = CharQueue(code)
-        self.file_name: str = file_name
+        self.file_name: str = self.ctx.file_name
         self.loc: Loc = Loc.new()
         self.char: Optional[str] = None
         self.lexeme: List[str] = []
@@ -46,9 +57,7 @@ class Lex:
         self.interpol_depth: int = 0
         self.in_interpol: bool = False
 
-        self.lines: List[str] = code.split("\n")
-
-        Report.setup(file_name, self.lines)
+        self.lines: List[str] = self.ctx.lines
 
         self.advance()
 
@@ -1,6 +1,6 @@
 import struct
 
-from typing import Self, List, Tuple, Optional
+from typing import Hashable, Self, List, Tuple, Optional
 from enum import auto, Enum
 
 class ValType(Enum):
@@ -46,6 +46,11 @@ class Const[T]:
     def emit(self) -> List[bytes]:
         ...
 
+    def key(self) -> Hashable:
+        # consts that are equal must have equal keys, so that they can be
+        # deduplicated through a dict
+        ...
+
     def __eq__(self, other: Self) -> bool:
         _ = other
 
@@ -59,6 +64,9 @@ class BoolLit(Const[bool]):
             self.emit_int(int(self.value), 1)
         ]
 
+    def key(self) -> Hashable:
+        return (ValType.BOOL, self.value)
+
     def __eq__(self, other: Const) -> bool:
         return (
             isinstance(other, BoolLit) and
@@ -75,6 +83,9 @@ class NilLit(Const[None]):
             self.emit_type(ValType.NIL)
         ]
 
+    def key(self) -> Hashable:
+        return ValType.NIL
+
     def __eq__(self, other: Const) -> bool:
         return isinstance(other, NilLit)
 
@@ -88,6 +99,9 @@ class Empty(Const[None]):
             self.emit_type(ValType.EMPTY)
         ]
 
+    def key(self) -> Hashable:
+        return ValType.EMPTY
+
     def __eq__(self, other: Const) -> bool:
         return isinstance(other, Empty)
 
@@ -102,6 +116,9 @@ class Num(Const[float]):
             struct.pack("<d", self.value)
         ]
 
+    def key(self) -> Hashable:
+        return (ValType.NUM, self.value)
+
     def __eq__(self, other: Const) -> bool:
         return (
             isinstance(other, Num) and
@@ -158,6 +175,9 @@ class StrLit(Const[Tuple[str, str, bool]]):
             self.emit_int(is_interned, 1)
         ]
 
+    def key(self) -> Hashable:
+        return (ObjType.STR, self.value[1])
+
     def __eq__(self, other: Const) -> bool:
         if not isinstance(other, StrLit):
             return False
@@ -213,6 +233,9 @@ class TableLit(Const[List[Const]]):
             self.entries_match(entries[1:], other_entries[1:])
         )
 
+    def key(self) -> Hashable:
+        return (ObjType.TABLE, tuple(e.key() for e in self.value))
+
     def __eq__(self, other: Const) -> bool:
         if not isinstance(other, TableLit):
             return False
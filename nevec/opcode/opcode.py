@@ -45,6 +45,14 @@ class Opcode(Enum):
     TABLEGET = auto()
 
     RET = auto()
+
+    # opcodes added since are only ever appended, so that every opcode
+    # already out there in .geada files keeps its number
+    CONCATN = auto()
+    UCONCATN = auto()
+    CALL = auto()
+    SPILL = auto()
+    RELOAD = auto()
     
     def raw(self) -> int:
         return self.value - 1
@@ -8,13 +8,12 @@ class ConstFold(Pass):
         right = bin_op.right
 
         if not self.is_propagatable(left) or not self.is_propagatable(right):
-            self.emit(ctx)
             return
 
         opt = self.fold_bin_op(bin_op, ctx)
         ctx.update(opt)
-        
-        self.emit(opt)
+
+        self.replace(ctx, opt)
 
         self.elim_if_dead(left.sym)
         self.elim_if_dead(right.sym)
@@ -24,28 +23,40 @@ class ConstFold(Pass):
         right = concat.right
 
         if not self.is_propagatable(left) or not self.is_propagatable(right):
-            self.emit(ctx)
             return
 
         opt = self.fold_concat(concat, ctx)
         ctx.update(opt)
 
-        self.emit(opt)
+        self.replace(ctx, opt)
 
         self.elim_if_dead(left.sym)
         self.elim_if_dead(right.sym)
 
+    def visit_IConcatN(self, concat: IConcatN, ctx: Tac):
+        parts = concat.parts
+
+        if not all(map(self.is_propagatable, parts)):
+            return
+
+        opt = self.fold_concat_n(concat, ctx)
+        ctx.update(opt)
+
+        self.replace(ctx, opt)
+
+        for part in parts:
+            self.elim_if_dead(part.sym)
+
     def visit_IUnOp(self, un_op: IUnOp, ctx: Tac):
         operand = un_op.operand
 
         if not self.is_propagatable(operand):
-            self.emit(ctx)
             return
 
         opt = self.fold_un_op(un_op, ctx)
         ctx.update(opt)
 
-        self.emit(opt)
+        self.replace(ctx, opt)
 
         self.elim_if_dead(operand.sym)
 
@@ -65,12 +76,7 @@ class ConstFold(Pass):
     def fold_num(self, un_op: IUnOp, ctx: Tac) -> Tac:
         dest_sym = ctx.sym
 
-        operand = un_op.operand.expr
-
-        assert isinstance(operand, IConst)
-
-        operand_sym = un_op.operand.sym
-        operand_sym.propagate()
+        operand = self.const_of(un_op.operand)
 
         # the only possible operand--right now--is Op.NEG
         result = -operand.value
@@ -80,12 +86,7 @@ class ConstFold(Pass):
     def fold_bool(self, un_op: IUnOp, ctx: Tac) -> Tac:
         dest_sym = ctx.sym
 
-        operand = un_op.operand.expr
-
-        assert isinstance(operand, IConst)
-
-        operand_sym = un_op.operand.sym
-        operand_sym.propagate()
+        operand = self.const_of(un_op.operand)
 
         # i'm so sorry for what's below
         result = None
@@ -115,12 +116,7 @@ class ConstFold(Pass):
     def fold_show(self, un_op: IUnOp, ctx: Tac) -> Tac:
         dest_sym = ctx.sym
 
-        operand = un_op.operand.expr
-
-        assert isinstance(operand, IConst)
-
-        operand_sym = un_op.operand.sym
-        operand_sym.propagate()
+        operand = self.const_of(un_op.operand)
 
         # TODO: replace all this with an inline `.show`
         result = None
@@ -141,11 +137,6 @@ class ConstFold(Pass):
         return self.folded(dest_sym, un_op, result)
 
     def fold_bin_op(self, bin_op: IBinOp, ctx: Tac) -> Tac:
-        left = bin_op.left
-        right = bin_op.right
-
-        assert self.is_propagatable(left) and self.is_propagatable(right)
-
         match bin_op.type:
             case Types.INT | Types.FLOAT:
                 return self.fold_arith(bin_op, ctx) 
@@ -158,12 +149,8 @@ class ConstFold(Pass):
     def fold_arith(self, bin_op: IBinOp, ctx: Tac) -> Tac:
         dest_sym = ctx.sym
 
-        self.propagate_operands(bin_op)
-
-        left_node = bin_op.left.expr
-        right_node = bin_op.right.expr
-
-        assert isinstance(left_node, IConst) and isinstance(right_node, IConst)
+        left_node = self.const_of(bin_op.left)
+        right_node = self.const_of(bin_op.right)
 
         left = left_node.value
         right = right_node.value
@@ -213,34 +200,47 @@ class ConstFold(Pass):
     def fold_comparison(self, bin_op: IBinOp, ctx: Tac) -> Tac:
         dest_sym = ctx.sym
 
-        self.propagate_operands(bin_op)
-
-        left_node = bin_op.left.expr
-        right_node = bin_op.right.expr
-
-        assert isinstance(left_node, IConst) and isinstance(right_node, IConst)
+        left_node = self.const_of(bin_op.left)
+        right_node = self.const_of(bin_op.right)
 
         left = left_node.value
         right = right_node.value
 
-        # i'm equally sorry about this
-        left = f"\"{left}\"" if isinstance(left_node, IStr) else left
-        right = f"\"{right}\"" if isinstance(right_node, IStr) else right
-        
-        # ...  and this
-        result = eval(f"{left} {bin_op.op_lexeme} {right}")
+        result = None
+
+        match bin_op.op:
+            case IBinOp.Op.EQ:
+                result = left == right
+
+            case IBinOp.Op.NEQ:
+                result = left != right
+
+            case IBinOp.Op.GT:
+                result = left > right
+
+            case IBinOp.Op.GTE:
+                result = left >= right
+
+            case IBinOp.Op.LT:
+                result = left < right
+
+            case IBinOp.Op.LTE:
+                result = left <= right
+
+            case _:
+                raise NotImplementedError(
+                    "optimization for IBinOp.Op." +
+                    bin_op.op.name +
+                    "not implemented"
+                )
 
         return self.folded(dest_sym, bin_op, result)
 
     def fold_concat(self, concat: IConcat, ctx: Tac) -> Tac:
         dest_sym = ctx.sym
 
-        self.propagate_operands(concat)
-
-        left_node = concat.left.expr
-        right_node = concat.right.expr
-
-        assert isinstance(left_node, IConst) and isinstance(right_node, IConst)
+        left_node = self.const_of(concat.left)
+        right_node = self.const_of(concat.right)
 
         left = left_node.value
         right = right_node.value
@@ -248,10 +248,31 @@ class ConstFold(Pass):
 
         return self.folded(dest_sym, concat, result)
 
+    def fold_concat_n(self, concat: IConcatN, ctx: Tac) -> Tac:
+        dest_sym = ctx.sym
+
+        values = []
+
+        for part in concat.parts:
+            values.append(self.const_of(part).value)
+
+        result = "".join(values)
+
+        return self.folded(dest_sym, concat, result)
+
+    def const_of(self, operand: Operand) -> IConst:
+        assert isinstance(operand.expr, IConst)
+
+        return operand.expr
+
     def folded[T](self, dest_sym: Sym, node: IExpr, value: T) -> Tac:
         expr = None
 
+        # bools have to come before ints, which they're a subclass of
         match value:
+            case bool():
+                expr = IBool(bool(value), node.loc)
+
             case str():
                 expr = IStr(value, node.loc, node.type)
             
@@ -261,18 +282,7 @@ class ConstFold(Pass):
             case float():
                 expr = IFloat(float(value), node.loc, node.type)
 
-            case bool():
-                expr = IBool(bool(value), node.loc)
-
         if expr is None:
             raise ValueError("optimization error:", expr)
 
         return Tac(dest_sym, expr, node.loc)
-
-    def propagate_operands(self, node: IBinOp | IConcat):
-        left_sym = node.left.sym
-        right_sym = node.right.sym
-
-        left_sym.propagate()
-        right_sym.propagate()
-
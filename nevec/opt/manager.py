@@ -0,0 +1,139 @@
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from nevec.ir.chains import DefUse
+from nevec.ir.ir import *
+from nevec.ir.verify import Verify
+
+from nevec.opt.passes import Pass
+
+class PassReport:
+    def __init__(self, name: str):
+        self.name: str = name
+
+        self.runs: int = 0
+        self.changes: int = 0
+
+        self.elapsed: float = 0.0
+
+        # how many instructions the pass added overall, negative if it
+        # removed more than it added
+        self.delta: int = 0
+
+    def record(self, elapsed: float, delta: int, changed: bool):
+        self.runs += 1
+        self.changes += int(changed)
+
+        self.elapsed += elapsed
+        self.delta += delta
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.name:<20}{self.runs:>6}{self.changes:>9}"
+            f"{self.elapsed * 1000:>10.2f}ms{self.delta:>+8}"
+        )
+
+
+class PassManager:
+    def __init__(self, syms: Syms, verify: Optional[Verify]=None):
+        self.syms: Syms = syms
+        self.verify: Optional[Verify] = verify
+
+        self.passes: List[type[Pass]] = []
+
+        # how to build each analysis a pass can ask for, and the ones that
+        # are still valid for the IR as it is right now
+        self.builders: Dict[type, Callable[[List[Tac]], Any]] = {
+            DefUse: DefUse
+        }
+
+        self.analyses: Dict[type, Any] = {}
+
+        self.reports: Dict[str, PassReport] = {}
+
+    def register(self, pass_type: type[Pass]):
+        for analysis in pass_type.REQUIRES:
+            if analysis not in self.builders:
+                raise ValueError(
+                    f"{pass_type.__name__} requires {analysis.__name__}, "
+                    "which isn't a registered analysis"
+                )
+
+        self.passes.append(pass_type)
+
+    def register_analysis(
+        self,
+        analysis: type,
+        build: Callable[[List[Tac]], Any]
+    ):
+        self.builders[analysis] = build
+
+    def analysis(self, analysis: type, ir: List[Tac]) -> Any:
+        if analysis not in self.analyses:
+            self.analyses[analysis] = self.builders[analysis](ir)
+
+        return self.analyses[analysis]
+
+    def invalidate(self, preserved: List[type]):
+        self.analyses = {
+            a: result
+            for a, result in self.analyses.items()
+            if a in preserved
+        }
+
+    def run(self, ir: List[Tac]) -> List[Tac]:
+        # goes through every pass again for as long as any of them still
+        # finds something to change
+        changed = True
+
+        while changed:
+            changed = False
+
+            for pass_type in self.passes:
+                ir, pass_changed = self.run_pass(pass_type, ir)
+
+                changed = changed or pass_changed
+
+        # symbol ids change here, and every analysis is keyed by them
+        self.syms.cleanup(renumber=False)
+        self.invalidate([])
+
+        return ir
+
+    def run_pass(
+        self,
+        pass_type: type[Pass],
+        ir: List[Tac]
+    ) -> Tuple[List[Tac], bool]:
+        name = pass_type.__name__
+
+        opt_pass = pass_type(self.syms)
+
+        analyses = {a: self.analysis(a, ir) for a in pass_type.REQUIRES}
+
+        start = time.perf_counter()
+        opt_ir = opt_pass.run(ir, analyses)
+        elapsed = time.perf_counter() - start
+
+        report = self.reports.setdefault(name, PassReport(name))
+        report.record(elapsed, len(opt_ir) - len(ir), opt_pass.changed)
+
+        if opt_pass.changed:
+            self.invalidate(pass_type.PRESERVES)
+
+        # the index's counts are only what the pass kept track of, so they
+        # get checked against the IR before they're written anywhere
+        index = analyses[DefUse]
+
+        if self.verify is not None:
+            self.verify.verify(opt_ir, name, index.uses_of)
+
+        index.write_uses(self.syms)
+
+        return opt_ir, opt_pass.changed
+
+    def report(self) -> str:
+        header = f"{'pass':<20}{'runs':>6}{'changed':>9}{'time':>12}{'delta':>8}"
+
+        return "\n".join([header] + list(map(str, self.reports.values())))
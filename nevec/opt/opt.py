@@ -1,7 +1,9 @@
 from nevec.ir.ir import *
+from nevec.ir.verify import Verify
 
+from nevec.opt.manager import PassManager
 from nevec.opt.passes import Pass
-from nevec.opt.const import ConstFold
+from nevec.opt.sccp import Sccp
 from nevec.opt.table import TablePropagation
 
 class Opt:
@@ -10,36 +12,30 @@ class Opt:
     ]
 
     PASSES: List[type[Pass]] = [
-        ConstFold
+        Sccp
     ]
 
-    def __init__(self, syms: Syms, do_opt: bool):
+    def __init__(self, syms: Syms, do_opt: bool, debug: bool=False):
         self.syms: Syms = syms
-        
-        self.all_passes: List[type[Pass]] = Opt.UNCONDITIONAL_PASSES
 
-        if do_opt:
-            self.all_passes.extend(Opt.PASSES)
-
-    def optimize(self, ir: List[Tac]) -> List[Tac]:
-        optimized = self.optimization_cycle(ir, self.all_passes)
+        # cheap enough to always run after every pass; `debug` adds the
+        # exhaustive checks on top
+        self.verify: Verify = Verify(syms, debug)
 
-        if optimized == ir:
-            return optimized
+        # a copy, so that turning optimizations on here doesn't turn them
+        # on for every other Opt too
+        self.all_passes: List[type[Pass]] = list(Opt.UNCONDITIONAL_PASSES)
 
-        return self.optimize(optimized)
+        if do_opt:
+            self.all_passes.extend(Opt.PASSES)
 
-    def optimization_cycle(
-        self,
-        ir: List[Tac],
-        passes: List[type[Pass]]
-    ) -> List[Tac]:
-        if passes == []:
-            self.syms.cleanup()
-            return ir
+        self.manager: PassManager = PassManager(syms, self.verify)
 
-        opt_pass = passes[0](self.syms)
+        for pass_type in self.all_passes:
+            self.manager.register(pass_type)
 
-        opt_ir = opt_pass.optimize(ir)
+    def optimize(self, ir: List[Tac]) -> List[Tac]:
+        return self.manager.run(ir)
 
-        return self.optimization_cycle(opt_ir, passes[1:])
+    def report(self) -> str:
+        return self.manager.report()
@@ -1,63 +1,78 @@
+from typing import Any, Dict, List
+
 from nevec.ir.ir import *
+from nevec.ir.chains import DefUse
 
 from nevec.ast.visit import Visit
 
 class Pass(Visit[Ir, None]):
-    def __init__(self, syms: Syms):
-        self.opts: List[Tac] = []
+    # the analyses a pass needs handed to it, and the ones it keeps up to
+    # date by itself--see `PassManager`
+    REQUIRES: List[type] = [DefUse]
+    PRESERVES: List[type] = [DefUse]
 
+    def __init__(self, syms: Syms):
         self.syms: Syms = syms
 
-        self.new_indices: Dict[int, int] = {}
+        self.index: DefUse = DefUse([])
+
+        # whether the pass rewrote anything at all
+        self.changed: bool = False
 
     def optimize(self, ir: List[Tac]) -> List[Tac]:
-        if ir == []:
-            return self.opts
+        index = DefUse(ir)
+        optimized = self.run(ir, {DefUse: index})
 
-        head = ir[0]
-        self.visit(head)
+        # brings the use counts `Syms.cleanup` relies on in line with the
+        # index; `PassManager` verifies them first
+        index.write_uses(self.syms)
 
-        return self.optimize(ir[1:])
+        return optimized
 
-    def emit(self, *tac: Tac):
-        self.opts.extend(tac)
+    def run(self, ir: List[Tac], analyses: Dict[type, Any]) -> List[Tac]:
+        # passes rewrite the stream through the index, which keeps every
+        # definition, use and position a lookup away
+        self.index = analyses[DefUse]
 
-    def find_new_index(self, sym: Sym) -> Optional[int]:
-        return next(
-            (
-                i 
-                for i, o in enumerate(self.opts)
-                if o.sym.full_name == sym.full_name
-            ),
-            None 
-        )
+        for tac in ir:
+            self.visit(tac)
+
+        return self.index.ir()
+
+    def replace(self, old: Tac, new: Tac):
+        self.changed = True
+
+        self.index.replace(old, new)
+
+    def remove(self, tac: Tac):
+        self.changed = True
+
+        self.index.remove(tac)
 
     def elim_if_dead(self, sym: Sym):
-        if sym.uses > 0:
+        if self.index.uses_of(sym) > 0:
             return
 
-        index = self.find_new_index(sym)
+        tac = self.index.def_of(sym)
 
-        if index is None:
+        if tac is None:
             raise ValueError(
                 "attempt to eliminate symbol that does not exist: "
                 f"{sym.full_name}"
             )
 
-        del self.opts[index]
-
-        del sym
+        self.remove(tac)
 
     def visit(self, node: Ir, *ctx: Tac):
         method_name = "visit_" + type(node).__name__
         method = getattr(self, method_name, None)
 
         if method is None:
-            # i.e. this optimization pass doesn't involve type(node)
-            self.emit(*ctx)
+            # i.e. this optimization pass doesn't involve type(node), so
+            # the Tac stays as it is
             return
 
-        method(node, *ctx) 
+        method(node, *ctx)
 
     def visit_Tac(self, tac: Tac):
         self.visit(tac.expr, tac)
@@ -65,6 +80,5 @@ class Pass(Visit[Ir, None]):
     def is_propagatable(self, operand: Operand) -> bool:
         return (
             isinstance(operand.expr, IConst) and
-            operand.sym.uses <= 1 
+            self.index.uses_of(operand.sym) <= 1
         )
-
@@ -0,0 +1,386 @@
+import copy
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from nevec.ir.cfg import Block, Cfg
+from nevec.ir.chains import DefUse
+from nevec.ir.ir import *
+
+from nevec.opt.const import ConstFold
+
+class Overdefined:
+    def __repr__(self) -> str:
+        return "overdefined"
+
+
+# what propagation knows about a symbol: nothing yet for as long as it's
+# missing from `Sccp.values`, then a constant, then maybe `OVERDEFINED` once
+# it could be more than one value.  symbols only ever move down that list
+type Value = IConst | Overdefined
+
+OVERDEFINED = Overdefined()
+
+class Sccp(ConstFold):
+    # Wegman and Zadeck's sparse conditional constant propagation: values
+    # flow along def-use edges and blocks only along the edges a branch can
+    # actually take, so each symbol is looked at again only when one of its
+    # operands changes, which happens at most twice
+    def __init__(self, syms: Syms):
+        super().__init__(syms)
+
+        self.values: Dict[int, Value] = {}
+
+        # edges as (predecessor id, successor id), and the ids of the blocks
+        # at least one of them leads to
+        self.executable: Set[Tuple[int, int]] = set()
+        self.reached: Set[int] = set()
+
+        self.users: Dict[int, List[Tac]] = {}
+        self.blocks: Dict[Tac, Block] = {}
+
+        # the blocks branching on each symbol
+        self.branches: Dict[int, List[Block]] = {}
+
+    def run(self, ir: List[Tac], analyses: Dict[type, Any]) -> List[Tac]:
+        # straight-line IR is a single block, which is always reached
+        self.index = analyses[DefUse]
+
+        self.propagate(Cfg.of(ir, self.syms))
+
+        for tac in ir:
+            folded = self.fold(tac, self.index.users_of(tac.sym))
+
+            if folded is not None:
+                self.replace(tac, folded)
+
+        for tac in self.index.ir():
+            if self.is_dead(tac, self.index.uses_of(tac.sym)):
+                self.remove(tac)
+
+        return self.index.ir()
+
+    def optimize_cfg(self, cfg: Cfg):
+        self.propagate(cfg)
+        self.prune(cfg)
+
+        users: Dict[int, List[Tac]] = {}
+
+        for block in cfg.reverse_postorder():
+            for tac in block.all_tacs():
+                for sym in tac.used_syms():
+                    users.setdefault(sym.id, []).append(tac)
+
+        for block in cfg.reverse_postorder():
+            phis: List[Tac] = []
+            consts: List[Tac] = []
+
+            for phi in block.phis:
+                folded = self.fold(phi, users.get(phi.sym.id, []))
+
+                if folded is None:
+                    phis.append(phi)
+                else:
+                    consts.append(folded)
+
+            tacs = [
+                self.fold(t, users.get(t.sym.id, [])) or t
+                for t in block.tacs
+            ]
+
+            block.phis = phis
+            block.tacs = consts + tacs
+
+        uses = self.count_uses(cfg)
+
+        for block in cfg.reverse_postorder():
+            block.tacs = [
+                t
+                for t in block.tacs
+                if not self.is_dead(t, uses.get(t.sym.id, 0))
+            ]
+
+        for sym in self.syms.syms:
+            sym.uses = uses.get(sym.id, 0)
+
+        cfg.compute_doms()
+        cfg.number()
+
+    def propagate(self, cfg: Cfg):
+        for block in cfg.blocks:
+            for tac in block.all_tacs():
+                self.blocks[tac] = block
+
+                for sym in tac.used_syms():
+                    self.users.setdefault(sym.id, []).append(tac)
+
+            if block.cond is not None:
+                self.branches.setdefault(block.cond.id, []).append(block)
+
+        flow: List[Tuple[Optional[Block], Block]] = [(None, cfg.entry)]
+        ssa: List[Sym] = []
+
+        while flow != [] or ssa != []:
+            while flow != []:
+                pred, block = flow.pop()
+
+                if pred is not None:
+                    edge = (pred.id, block.id)
+
+                    if edge in self.executable:
+                        continue
+
+                    self.executable.add(edge)
+
+                # every new edge brings a new value into the phis
+                for phi in block.phis:
+                    self.evaluate(phi, ssa)
+
+                if block.id in self.reached:
+                    continue
+
+                self.reached.add(block.id)
+
+                for tac in block.tacs:
+                    self.evaluate(tac, ssa)
+
+                self.branch(block, flow)
+
+            while ssa != []:
+                sym = ssa.pop()
+
+                for user in self.users.get(sym.id, []):
+                    if self.blocks[user].id in self.reached:
+                        self.evaluate(user, ssa)
+
+                for block in self.branches.get(sym.id, []):
+                    if block.id in self.reached:
+                        self.branch(block, flow)
+
+    def evaluate(self, tac: Tac, ssa: List[Sym]):
+        if not tac.defines():
+            return
+
+        value = self.value_of(tac)
+
+        if value is None:
+            return
+
+        sym = tac.sym
+        old = self.values.get(sym.id)
+
+        if old is OVERDEFINED:
+            return
+
+        if isinstance(old, IConst) and isinstance(value, IConst):
+            if Sccp.same(old, value):
+                return
+
+            value = OVERDEFINED
+
+        self.values[sym.id] = value
+        ssa.append(sym)
+
+    def value_of(self, tac: Tac) -> Optional[Value]:
+        expr = tac.expr
+
+        if isinstance(expr, Phi):
+            return self.meet(tac)
+
+        if isinstance(expr, ITable) and self.is_written(tac.sym):
+            return OVERDEFINED
+
+        if isinstance(expr, IConst):
+            return expr
+
+        if not isinstance(expr, IUnOp | IBinOp | IConcat | IConcatN):
+            return OVERDEFINED
+
+        values = [self.values.get(o.sym.id) for o in expr.operands()]
+
+        if any(v is OVERDEFINED for v in values):
+            return OVERDEFINED
+
+        if any(v is None for v in values):
+            return None
+
+        # nil can only be asked whether it's nil or shown
+        if any(isinstance(v, INil) for v in values) and (
+            not isinstance(expr, IUnOp)
+        ):
+            return OVERDEFINED
+
+        try:
+            match expr:
+                case IUnOp():
+                    folded = self.fold_un_op(expr, tac)
+
+                case IBinOp():
+                    folded = self.fold_bin_op(expr, tac)
+
+                case IConcat():
+                    folded = self.fold_concat(expr, tac)
+
+                case IConcatN():
+                    folded = self.fold_concat_n(expr, tac)
+
+        except (ArithmeticError, TypeError, ValueError, NotImplementedError):
+            # e.g. a division by zero, which is for the VM to report
+            return OVERDEFINED
+
+        assert isinstance(folded.expr, IConst)
+
+        return folded.expr
+
+    def meet(self, phi: Tac) -> Optional[Value]:
+        assert isinstance(phi.expr, Phi)
+
+        block = self.blocks[phi]
+        value: Optional[Value] = None
+
+        for pred, operand in phi.expr.incoming:
+            # whatever comes in along an edge no branch takes doesn't count
+            if (pred, block.id) not in self.executable:
+                continue
+
+            incoming = self.values.get(operand.sym.id)
+
+            if incoming is None:
+                continue
+
+            if incoming is OVERDEFINED:
+                return OVERDEFINED
+
+            if value is None:
+                value = incoming
+            elif not Sccp.same(value, incoming):
+                return OVERDEFINED
+
+        return value
+
+    def branch(
+        self,
+        block: Block,
+        flow: List[Tuple[Optional[Block], Block]]
+    ):
+        if block.cond is None:
+            flow.extend((block, s) for s in block.succs)
+            return
+
+        cond = self.values.get(block.cond.id)
+
+        if cond is None:
+            return
+
+        then, otherwise = block.succs
+
+        if not isinstance(cond, IBool):
+            flow.extend([(block, then), (block, otherwise)])
+            return
+
+        flow.append((block, then if cond.value else otherwise))
+
+    def is_written(self, table: Sym) -> bool:
+        # table propagation leaves the table sets it couldn't move into the
+        # literal, and a call or a phi hands the table to something that
+        # might write to it
+        return any(
+            isinstance(user.expr, TableSet | ICall | Phi)
+            for user in self.users.get(table.id, [])
+        )
+
+    def const_of(self, operand: Operand) -> IConst:
+        value = self.values.get(operand.sym.id)
+
+        assert isinstance(value, IConst)
+
+        return value
+
+    @staticmethod
+    def same(a: Value, b: Value) -> bool:
+        # 1, 1.0 and true all compare equal in Python
+        if type(a) is not type(b) or not isinstance(a, IConst):
+            return False
+
+        assert isinstance(b, IConst)
+
+        if isinstance(a, ITable):
+            return a is b
+
+        return isinstance(a, INil) or (
+            a.type == b.type and a.value == b.value
+        )
+
+    def fold(self, tac: Tac, users: List[Tac]) -> Optional[Tac]:
+        value = self.values.get(tac.sym.id)
+
+        if not tac.defines() or isinstance(tac.expr, IConst):
+            return None
+
+        if not isinstance(value, IConst):
+            return None
+
+        expr = copy.copy(value)
+        expr.loc = tac.expr.loc
+
+        folded = Tac(tac.sym, expr, tac.loc)
+        tac.update(folded)
+
+        # every user reads the constant straight from its operand from now
+        # on, not only the last one `Tac.operand` handed out
+        for user in users:
+            if isinstance(user.expr, IOp):
+                continue
+
+            for operand in user.expr.operands():
+                if operand.sym is tac.sym:
+                    operand.expr = expr
+
+        return folded
+
+    def is_dead(self, tac: Tac, uses: int) -> bool:
+        return (
+            tac.defines() and
+            isinstance(tac.expr, IConst) and
+            uses == 0
+        )
+
+    def prune(self, cfg: Cfg):
+        # drops every edge no branch can take, which leaves unreachable
+        # blocks on their own
+        for block in cfg.blocks:
+            for succ in list(block.succs):
+                if (block.id, succ.id) in self.executable:
+                    continue
+
+                block.succs.remove(succ)
+                succ.preds.remove(block)
+
+            if block.cond is not None and len(block.succs) < 2:
+                block.cond = None
+
+            for phi in block.phis:
+                assert isinstance(phi.expr, Phi)
+
+                phi.expr.incoming = [
+                    (b, o)
+                    for b, o in phi.expr.incoming
+                    if (b, block.id) in self.executable
+                ]
+
+        for block in cfg.blocks:
+            if block.id not in self.reached:
+                block.phis = []
+                block.tacs = []
+
+    def count_uses(self, cfg: Cfg) -> Dict[int, int]:
+        uses: Dict[int, int] = {}
+
+        for block in cfg.reverse_postorder():
+            for tac in block.all_tacs():
+                for sym in tac.used_syms():
+                    uses[sym.id] = uses.get(sym.id, 0) + 1
+
+            if block.cond is not None:
+                uses[block.cond.id] = uses.get(block.cond.id, 0) + 1
+
+        return uses
@@ -7,26 +7,18 @@ class TablePropagation(Pass):
         val = table_set.expr
 
         if not self.is_propagatable(key) or not self.is_propagatable(val):
-            self.emit(ctx)
             return
 
         assert isinstance(key.expr, IConst) and isinstance(val.expr, IConst)
 
-        key_sym = table_set.key.sym
-        val_sym = table_set.expr.sym
-
-        key_sym.propagate()
-        val_sym.propagate()
-
-        dest_sym = table_set.table.sym
-
-        dest_sym.propagate()
-
         expr = table_set.table.expr 
 
         assert isinstance(expr, ITable)
 
         expr.add_entry(key.expr, val.expr)
 
-        self.elim_if_dead(key_sym)
-        self.elim_if_dead(val_sym)
+        # the entry now lives in the table literal itself
+        self.remove(ctx)
+
+        self.elim_if_dead(key.sym)
+        self.elim_if_dead(val.sym)
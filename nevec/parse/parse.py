@@ -2,19 +2,22 @@ from typing import Callable, Optional
 
 from nevec.err.err import Err, Note, NoteType, Line, Suggestion
 from nevec.err.report import Report
+from nevec.ctx.ctx import CompilationContext
 from nevec.lex.lex import Lex
 from nevec.lex.tok import Loc, Tok, TokType, TokTypes
 
 from nevec.ast.ast import *
 
 class ParseErr:
-    @staticmethod
-    def unexpected_char(tok: Tok) -> Err:
+    def __init__(self, report: Report):
+        self.report: Report = report
+
+    def unexpected_char(self, tok: Tok) -> Err:
         loc = tok.loc
 
         msg = tok.value if tok.value is not None else "invalid character"
 
-        err = Report.err(
+        err = self.report.err(
             msg,
             loc
         ).show(
@@ -31,8 +34,7 @@ class ParseErr:
 
         return err
 
-    @staticmethod
-    def unexpected_tok(tok: Tok, expected: TokType) -> Err:
+    def unexpected_tok(self, tok: Tok, expected: TokType) -> Err:
         loc = tok.loc
         
         expected_lexeme = {
@@ -43,7 +45,7 @@ class ParseErr:
 
         expected_lexeme = list(expected_lexeme)[0]
 
-        err = Report.err(
+        err = self.report.err(
             "unexpected token",
             loc
         ).show(
@@ -67,8 +69,7 @@ class ParseErr:
 
         return err
 
-    @staticmethod
-    def expected_tok(loc: Loc, expected: TokType) -> Err:
+    def expected_tok(self, loc: Loc, expected: TokType) -> Err:
         expected_lexeme = [
             lexeme 
             for lexeme in TokTypes.TOKS
@@ -77,7 +78,7 @@ class ParseErr:
 
         expected_lexeme = expected_lexeme[0]
 
-        err = Report.err(
+        err = self.report.err(
             f"'{expected_lexeme}' was expected, but found nothing",
             loc
         ).show(
@@ -101,14 +102,13 @@ class ParseErr:
 
         return err
 
-    @staticmethod
-    def expected_expr(tok: Tok) -> Err:
+    def expected_expr(self, tok: Tok) -> Err:
         loc = tok.loc
 
         is_at_end = tok.type == TokType.EOF
         lexeme = tok.lexeme if not is_at_end else "end of file"
 
-        err = Report.err(
+        err = self.report.err(
             "expected an expression",
             loc
         ).show(
@@ -129,11 +129,10 @@ class ParseErr:
 
         return err
 
-    @staticmethod
-    def expected(what: str, got: Tok) -> Err:
+    def expected(self, what: str, got: Tok) -> Err:
         loc = got.loc
 
-        err = Report.err(
+        err = self.report.err(
             f"expected {what}",
             loc
         ).show(
@@ -152,16 +151,24 @@ class ParseErr:
         return err
 
 class Parse:
-    def __init__(self, code: str):
-        self.lex: Lex = Lex(code)
+    def __init__(self, code: str, ctx: Optional[CompilationContext]=None):
+        self.ctx: CompilationContext = (
+            ctx
+            if ctx is not None
+            else CompilationContext(code)
+        )
+
+        self.lex: Lex = Lex(code, ctx=self.ctx)
+        self.errs: ParseErr = ParseErr(self.ctx.report)
+
         self.curr: Tok = Tok.eof()
         self.prev: Tok = Tok.eof()
 
         self.had_err: bool = False
         self.panic_mode: bool = False
 
-        self.file_name = self.lex.file_name
-        self.lines = self.lex.lines
+        self.file_name = self.ctx.file_name
+        self.lines = self.ctx.lines
 
         self.advance()
 
@@ -171,7 +178,7 @@ class Parse:
 
         self.panic_mode = True 
         self.had_err = True
-        err.print()
+        self.ctx.report.show(err)
 
     def advance(self):
         self.prev = self.curr
@@ -187,7 +194,7 @@ class Parse:
                 break
 
             # TODO: (re)implement proper error reporting
-            self.show_err(ParseErr.unexpected_char(self.curr))
+            self.show_err(self.errs.unexpected_char(self.curr))
 
     def check(self, *type: TokType) -> bool:
         return self.curr.type in type
@@ -198,10 +205,10 @@ class Parse:
             return
 
         if self.check(TokType.EOF, TokType.NEWLINE):
-            self.show_err(ParseErr.expected_tok(self.curr.loc, type))
+            self.show_err(self.errs.expected_tok(self.curr.loc, type))
             return
 
-        self.show_err(ParseErr.unexpected_tok(self.curr, type))
+        self.show_err(self.errs.unexpected_tok(self.curr, type))
 
     def match(self, *type: TokType) -> bool:
         if self.check(*type):
@@ -397,7 +404,7 @@ class Parse:
             case TokType.INTERPOL:
                 return self.interpol()
 
-        self.show_err(ParseErr.expected_expr(tok))
+        self.show_err(self.errs.expected_expr(tok))
         return Expr(Types.UNKNOWN, tok.loc)
 
     def int_lit(self) -> Int:
@@ -441,7 +448,7 @@ class Parse:
             next = self.interpol() 
         else:
             if not self.check(TokType.STR):
-                self.show_err(ParseErr.expected("a string", got=self.curr))
+                self.show_err(self.errs.expected("a string", got=self.curr))
 
                 loc = tok.loc.union_hull(self.curr.loc)
                 return Interpol(raw_str, interpol_expr, Str.empty(), loc)
@@ -0,0 +1,80 @@
+import test
+
+import os
+import subprocess
+import sys
+
+from nevec.cache.cache import CheckCache, CheckResult
+from nevec.check.type import TypeCheck
+from nevec.ctx.ctx import CompilationContext
+from nevec.parse.parse import Parse
+
+def check(code: str) -> CheckResult:
+    ctx = CompilationContext(code)
+    ast = Parse(code, ctx).parse()
+
+    return CheckResult.of(ctx, TypeCheck(ctx).visit(ast))
+
+class TestCache:
+    def test_round_trip(self, tmp_path):
+        cache = CheckCache(str(tmp_path))
+        ctx = CompilationContext("1 + 2.3")
+
+        assert cache.load(ctx) is None
+
+        result = check(ctx.code)
+        cache.store(ctx, result)
+
+        loaded = cache.load(ctx)
+
+        assert loaded is not None and loaded.had_err
+        assert loaded.diagnostics == result.diagnostics
+
+    def test_key(self, tmp_path):
+        cache = CheckCache(str(tmp_path))
+
+        a = CompilationContext("1 + 2")
+        b = CompilationContext("1 + 3")
+
+        assert cache.key_of(a) == cache.key_of(CompilationContext("1 + 2"))
+        assert cache.key_of(a) != cache.key_of(b)
+
+    def test_eviction(self, tmp_path):
+        result = check("1 + 2.3")
+
+        CheckCache(str(tmp_path)).store(CompilationContext("1 + 2.3"), result)
+        entry_size = next(tmp_path.glob("*.json")).stat().st_size
+
+        cache = CheckCache(str(tmp_path), max_size=entry_size * 4)
+
+        for i in range(32):
+            cache.store(CompilationContext(f"{i} + 2.3"), result)
+
+        entries = list(tmp_path.glob("*.json"))
+
+        assert 0 < len(entries) <= 4
+        assert cache.load(CompilationContext("31 + 2.3")) is not None
+
+    def test_driver_replay(self, tmp_path):
+        path = tmp_path / "broken.neve"
+        path.write_text("1 + 2.3")
+
+        root = os.path.join(os.path.dirname(__file__), "../..")
+        env = dict(os.environ, XDG_CACHE_HOME=str(tmp_path / "cache"))
+
+        runs = [
+            subprocess.run(
+                [sys.executable, "-m", "nevec", str(path)],
+                cwd=root,
+                env=env,
+                capture_output=True,
+                text=True
+            )
+            for _ in range(2)
+        ]
+
+        # the second run never gets past the cache
+        fresh, cached = [(r.returncode, r.stdout, r.stderr) for r in runs]
+
+        assert fresh[0] == 1
+        assert fresh == cached
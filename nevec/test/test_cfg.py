@@ -0,0 +1,119 @@
+import test
+
+import pytest
+
+from nevec.ast.type import Types
+from nevec.ir.cfg import Cfg
+from nevec.ir.ir import IBool, IInt, IRet, Tac
+from nevec.ir.sym import Syms
+from nevec.ir.verify import MalformedIr, Verify
+from nevec.lex.tok import Loc
+
+def const(cfg: Cfg, value: int | bool) -> Tac:
+    loc = Loc.new()
+
+    expr = (
+        IBool(value, loc)
+        if isinstance(value, bool)
+        else IInt(value, loc, Types.INT)
+    )
+
+    return Tac(cfg.syms.new_sym(Syms.NO_MOMENT), expr, loc)
+
+def ret(tac: Tac) -> Tac:
+    tac.sym.uses += 1
+
+    return Tac(tac.sym, IRet(tac.sym, tac.loc), tac.loc)
+
+def diamond() -> Cfg:
+    # b0: if true then b1 else b2; both join in b3
+    cfg = Cfg(Syms())
+
+    entry = cfg.entry
+    then, otherwise, join = cfg.new_block(), cfg.new_block(), cfg.new_block()
+
+    cond = const(cfg, True)
+    entry.add(cond)
+    cfg.branch(entry, cond.sym, then, otherwise)
+
+    one = const(cfg, 1)
+    then.add(one)
+    cfg.connect(then, join)
+
+    two = const(cfg, 2)
+    otherwise.add(two)
+    cfg.connect(otherwise, join)
+
+    phi = cfg.phi(join, [(then, one), (otherwise, two)], Loc.new())
+    join.add(ret(phi))
+
+    cfg.number()
+
+    return cfg
+
+class TestCfg:
+    def test_doms(self):
+        cfg = diamond()
+        cfg.compute_doms()
+
+        entry, then, otherwise, join = cfg.blocks
+
+        assert join.idom is entry and then.idom is entry
+        assert set(b.id for b in entry.children) == {1, 2, 3}
+
+        assert cfg.dominates(entry, join)
+        assert not cfg.dominates(then, join)
+
+        frontiers = cfg.frontiers()
+
+        assert frontiers[then.id] == {join.id}
+        assert frontiers[entry.id] == set()
+
+    def test_loop(self):
+        cfg = Cfg(Syms())
+
+        head, body, exit = cfg.new_block(), cfg.new_block(), cfg.new_block()
+
+        cfg.connect(cfg.entry, head)
+        cfg.connect(head, body)
+        cfg.connect(head, exit)
+        cfg.connect(body, head)
+
+        cfg.compute_doms()
+
+        assert body.idom is head and exit.idom is head
+        assert cfg.frontiers()[body.id] == {head.id}
+
+    def test_long_chain(self):
+        cfg = Cfg(Syms())
+
+        last = cfg.entry
+        for _ in range(5000):
+            block = cfg.new_block()
+            cfg.connect(last, block)
+            last = block
+
+        cfg.compute_doms()
+
+        assert last.idom is cfg.blocks[-2]
+
+    def test_verify(self):
+        cfg = diamond()
+
+        Verify(cfg.syms).verify_cfg(cfg)
+
+        # `1` doesn't dominate the join, so it can't be used there directly
+        join = cfg.blocks[3]
+        one = cfg.blocks[1].tacs[0]
+
+        join.add(ret(one))
+
+        with pytest.raises(MalformedIr):
+            Verify(cfg.syms).verify_cfg(cfg)
+
+    def test_moments(self):
+        cfg = diamond()
+
+        moments = [t.moment for t in cfg.linearize() if t.defines()]
+
+        assert moments == sorted(set(moments))
@@ -1,13 +1,17 @@
 import test
 
+from concurrent.futures import ThreadPoolExecutor
+
 from nevec.check.type import TypeCheck
+from nevec.ctx.ctx import CompilationContext
+from nevec.lex.tok import Loc
 from nevec.parse.parse import Parse
 
 def all_ok(input) -> bool:
     parse = Parse(input)
     ast = parse.parse()
 
-    return not TypeCheck().visit(ast)
+    return not TypeCheck(parse.ctx).visit(ast)
 
 class TestCheck:
     def test_one(self):
@@ -45,3 +49,40 @@ class TestCheck:
 
     def test_twelve(self):
         assert not all_ok("(1 +\n4.3)")
+
+    def test_separate_contexts(self):
+        inputs = ["1 + 2.3", "4.2 + 0.3", "6.4 & 3.4", "(nil)"] * 8
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(all_ok, inputs))
+
+        assert results == [False, True, False, True] * 8
+
+    def test_max_errors(self):
+        ctx = CompilationContext("1 + 2.3 + 6.4 & 3.4", max_errors=1)
+
+        ast = Parse(ctx.code, ctx).parse()
+
+        assert TypeCheck(ctx).visit(ast)
+        assert ctx.report.shown == 1 and ctx.report.suppressed > 0
+
+    def test_dedup(self):
+        ctx = CompilationContext("1 + 2.3")
+        loc = Loc(1, 1, 1)
+
+        ctx.report.show(ctx.report.err("mismatched types: Int, Float", loc))
+        ctx.report.show(ctx.report.err("mismatched types: Int, Float", loc))
+
+        assert ctx.report.shown == 1 and ctx.report.suppressed == 1
+
+    def test_large_table(self):
+        entries = [f"{i}: \"v{i}\"" for i in range(5000)]
+
+        assert all_ok("[" + ", ".join(entries) + "]")
+        assert not all_ok("[" + ", ".join(entries + ["1.5: \"x\""]) + "]")
+
+    def test_table_mismatch(self):
+        ast = Parse("[1: 1, 2: 2, 3: 3.0, 4: 4]").parse()
+        table = ast.expr
+
+        assert table.key_mismatch is None and table.val_mismatch == 2
@@ -0,0 +1,34 @@
+import test
+
+from nevec.err.err import Err, Line, Note, RenderCache
+from nevec.lex.tok import Loc
+
+def make_err(cache: RenderCache) -> Err:
+    lines = ["let x = 1 + 2.3", "x"]
+    loc = Loc(9, 1, 1)
+
+    return Err("test.neve", lines, "mismatched types", loc, cache).show(
+        Line(loc).add(Note.err(loc, "Int")).add(
+            Note.harmless(Loc(13, 1, 3), "Float")
+        )
+    )
+
+class TestErr:
+    def test_cached_render(self):
+        cache = RenderCache()
+
+        first = make_err(cache).emit()
+        second = make_err(cache).emit()
+
+        assert first == second == make_err(RenderCache()).emit()
+        assert cache.hits == 2 and cache.misses == 2
+
+    def test_long_line(self):
+        lines = [" + ".join(["1"] * 2000)]
+        loc = Loc(5, 1, 1)
+
+        err = Err("test.neve", lines, "long", loc).show(
+            Line(loc).add(Note.err(loc, "here"))
+        )
+
+        assert "here" in err.emit()
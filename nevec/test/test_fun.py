@@ -0,0 +1,128 @@
+import test
+
+import pytest
+
+from nevec.ast.type import Types
+from nevec.compile.compile import Compile
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.fun import Fun
+from nevec.ir.ir import IBinOp, IInt, IRet, Tac
+from nevec.ir.reg import InterferenceGraph, LinearScan
+from nevec.ir.sym import Syms
+from nevec.lex.tok import Loc
+
+def add_fun() -> Fun:
+    # fun add(a, b) = a + b
+    loc = Loc.new()
+    fun = Fun("add", 0, [Types.INT, Types.INT], loc)
+
+    a, b = fun.params
+
+    expr = IBinOp(
+        a.operand(),
+        IBinOp.Op.ADD,
+        b.operand(),
+        "+",
+        loc,
+        Types.INT
+    )
+
+    a.sym.last_used(2)
+    b.sym.last_used(2)
+
+    sum = Tac(fun.syms.new_sym(2), expr, loc)
+    sum.sym.last_used(3)
+
+    fun.ir += [sum, Tac(sum.sym, IRet(sum.sym, loc), loc)]
+
+    return fun
+
+def const(syms: Syms, value: int, moment: int) -> Tac:
+    loc = Loc.new()
+
+    return Tac(syms.new_sym(moment), IInt(value, loc, Types.INT), loc)
+
+class TestFun:
+    def test_params(self):
+        fun = add_fun()
+        graph = fun.allocate()
+
+        assert [graph.get_reg(p.sym) for p in fun.params] == [0, 1]
+        assert graph.get_reg(fun.ir[2].sym) == 0
+
+    def test_unused_param(self):
+        fun = Fun("f", 0, [Types.INT], Loc.new())
+
+        graph = fun.allocate()
+
+        assert graph.get_reg(fun.params[0].sym) == 0
+
+    def test_window(self):
+        add = add_fun()
+
+        # x = 5; y = add(1, 2); x + y
+        syms = Syms()
+
+        x = const(syms, 5, 0)
+        one = const(syms, 1, 1)
+        two = const(syms, 2, 2)
+
+        call = add.call(syms, [one, two], 3, Loc.new(), Types.INT)
+
+        x.sym.last_used(4)
+        call.sym.last_used(4)
+
+        graph = InterferenceGraph(syms.values(), calls=[call])
+
+        base = call.expr.base
+        regs = [graph.get_reg(s) for s in (x.sym, one.sym, two.sym)]
+
+        # the arguments sit right above `x`, which outlives the call
+        assert regs == [0, base, base + 1]
+        assert base == 1
+
+    def test_no_window(self):
+        add = add_fun()
+
+        syms = Syms()
+
+        one = const(syms, 1, 0)
+        two = const(syms, 2, 1)
+
+        call = add.call(syms, [one, two], 2, Loc.new(), Types.INT)
+        call.sym.last_used(3)
+
+        ir = [one, two, call]
+
+        # linear scan has no idea about windows, which mustn't end up as a
+        # base of -1 in the bytecode
+        compile = Compile(LinearScan(syms.values()), CompilationContext(""))
+
+        with pytest.raises(ValueError):
+            compile.compile(ir)
+
+    def test_nested_windows(self):
+        add = add_fun()
+
+        # x = 5; add(x, add(1, 2))
+        syms = Syms()
+
+        x = const(syms, 5, 0)
+        one = const(syms, 1, 1)
+        two = const(syms, 2, 2)
+
+        inner = add.call(syms, [one, two], 3, Loc.new(), Types.INT)
+        outer = add.call(syms, [x, inner], 4, Loc.new(), Types.INT)
+        outer.sym.last_used(5)
+
+        graph = InterferenceGraph(syms.values(), calls=[inner, outer])
+
+        regs = [graph.get_reg(s) for s in (x.sym, inner.sym)]
+
+        # `x` already sits in the outer window while the inner call runs,
+        # so the inner window can't start at or below it
+        assert regs == [outer.expr.base, outer.expr.base + 1]
+        assert inner.expr.base > graph.get_reg(x.sym)
+
+        assert graph.get_reg(one.sym) == inner.expr.base
+        assert graph.get_reg(two.sym) == inner.expr.base + 1
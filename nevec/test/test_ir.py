@@ -0,0 +1,271 @@
+import test
+
+import pytest
+
+from typing import List
+
+from nevec.ast.ast import *
+from nevec.ast.type import Types
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.chains import DefUse
+from nevec.ir.ir import IBinOp, IConcatN, IInt, IRet, Tac
+from nevec.ir.sym import Syms
+from nevec.ir.toir import ToIr
+from nevec.ir.verify import MalformedIr, Verify
+from nevec.lex.tok import Loc, Tok, TokType
+from nevec.opt.opt import Opt
+from nevec.parse.parse import Parse
+
+def build_ir(code: str) -> ToIr:
+    ctx = CompilationContext(code)
+    ast = Parse(code, ctx).parse()
+
+    toir = ToIr(ctx)
+    toir.build_ir(ast)
+
+    return toir
+
+def show(ir: List[Tac]) -> str:
+    return "\n".join(map(str, ir))
+
+class TestSyms:
+    def test_fresh_names(self):
+        syms = Syms()
+
+        made = [syms.new_sym(i) for i in range(10000)]
+
+        assert [s.full_name for s in made[:3]] == ["t0", "t1", "t2"]
+        assert made[-1].full_name == "t9999"
+        assert len({s.id for s in made}) == len(made)
+
+    def test_names_per_base(self):
+        syms = Syms()
+
+        a = syms.new_sym(0)
+        b = syms.new_sym(1, name="k")
+        c = syms.new_sym(2)
+
+        assert (a.full_name, b.full_name, c.full_name) == ("t0", "k0", "t1")
+
+    def test_after_cleanup(self):
+        syms = Syms()
+
+        made = [syms.new_sym(i) for i in range(4)]
+        made[1].uses = 1
+        made[3].uses = 1
+
+        syms.cleanup()
+
+        assert [s.full_name for s in syms.values()] == ["t0", "t1"]
+        assert syms.new_sym(4).full_name == "t2"
+
+    def test_cleanup_without_renumbering(self):
+        syms = Syms()
+
+        made = [syms.new_sym(i) for i in range(4)]
+        made[1].uses = 1
+        made[3].uses = 1
+
+        syms.cleanup(renumber=False)
+
+        assert [s.full_name for s in syms.values()] == ["t1", "t3"]
+        assert syms.new_sym(4).full_name == "t4"
+
+        syms.renumber()
+
+        assert [s.full_name for s in syms.values()] == ["t0", "t1", "t2"]
+
+    def test_next_after(self):
+        syms = Syms()
+
+        made = [syms.new_sym(i) for i in range(4)]
+        made[1].uses = 1
+        made[3].uses = 1
+
+        assert syms.next_after(made[0]) is made[1]
+
+        syms.cleanup(renumber=False)
+
+        assert syms.next_after(made[1]) is None
+        assert syms.next_after(syms.new_sym(4)) is None
+
+        syms.renumber()
+
+        assert syms.next_after(made[1]) is made[3]
+
+    def test_copy(self):
+        syms = Syms()
+
+        sym = syms.new_sym(2, value=5)
+        sym.last_used(4)
+
+        copy = sym.copy()
+
+        # the copy doesn't take a name, or a row, from the table
+        assert len(syms) == 1
+        assert (copy.full_name, copy.first, copy.uses) == ("t0", 2, 0)
+        assert copy.lifetime is None
+
+        copy.last_used(6)
+        assert (sym.last, sym.uses) == (4, 1)
+
+        like = syms.new_sym_like(sym)
+
+        assert (like.full_name, like.first, like.value) == ("t1", 2, 5)
+        assert len(syms) == 2
+
+    def test_dense_ids(self):
+        syms = Syms()
+
+        made = [syms.new_sym(i) for i in range(6)]
+
+        list(map(lambda s: s.last_used(s.first + 2), made[::2]))
+
+        syms.cleanup()
+
+        assert [s.id for s in syms.values()] == [0, 1, 2]
+        assert [s.first for s in syms.values()] == [0, 2, 4]
+        assert [s.last for s in syms.values()] == [2, 4, 6]
+        assert made[1].id == Syms.NO_SYM
+
+        with pytest.raises(ValueError):
+            made[1].uses
+
+
+class TestToIr:
+    def test_deep_expr(self):
+        plus = Tok(TokType.PLUS, "+", Loc.new())
+
+        expr = Int(0, Loc.new())
+        for i in range(1, 5000):
+            expr = Arith(Int(i, Loc.new()), BinOp.Op.PLUS, expr, plus, Loc.new())
+
+        toir = ToIr(CompilationContext(""))
+        ir = toir.build_ir(Program(expr))
+
+        assert len(ir) == 5000 + 4999 + 1
+        assert toir.vals == [] and toir.work == []
+
+    def test_interpol(self):
+        ir = build_ir("\"a#{1}b#{\"c\"}d\"").ops
+
+        assert show(ir) == "\n".join([
+            "t0 = \"a\"",
+            "t1 = 1",
+            "t2 = show t1",
+            "t3 = \"b\"",
+            "t4 = \"c\"",
+            "t5 = \"d\"",
+            "t6 = concat t0 t2 t3 t4 t5",
+            "ret t6"
+        ])
+
+    def test_long_interpol(self):
+        code = "\"" + "#{1}x" * 300 + "\""
+
+        ir = build_ir(code).ops
+        concats = [t.expr for t in ir if isinstance(t.expr, IConcatN)]
+
+        assert len(concats) == 3
+        assert all(len(c.parts) <= IConcatN.MAX_PARTS for c in concats)
+
+
+class TestDefUse:
+    def test_lookups(self):
+        ir = build_ir("1 + 2").ops
+        one, two, add, ret = ir
+
+        index = DefUse(ir)
+
+        assert index.def_of(one.sym) is one
+        assert index.users_of(one.sym) == [add]
+        assert index.users_of(add.sym) == [ret]
+        assert index.position_of(ret) == 3
+
+    def test_updates(self):
+        ir = build_ir("[\"a\": 1]").ops
+        table, key, val, table_set, ret = ir
+
+        index = DefUse(ir)
+
+        assert index.uses_of(table.sym) == 2
+        assert index.def_of(key.sym) is key
+
+        index.remove(table_set)
+
+        assert index.uses_of(table.sym) == 1
+        assert index.uses_of(key.sym) == 0
+        assert index.position_of(ret) == 4
+
+        assert index.ir() == [table, key, val, ret]
+
+    def test_duplicate_operand(self):
+        syms = Syms()
+        loc = Loc.new()
+
+        # t0 = 2; t1 = t0 * t0; ret t1
+        two = Tac(syms.new_sym(0), IInt(2, loc, Types.INT), loc)
+
+        two.sym.last_used(1)
+        two.sym.last_used(1)
+
+        expr = IBinOp(
+            two.operand(),
+            IBinOp.Op.MUL,
+            two.operand(),
+            "*",
+            loc,
+            Types.INT
+        )
+
+        square = Tac(syms.new_sym(1), expr, loc)
+
+        square.sym.last_used(2)
+        ret = Tac(square.sym, IRet(square.sym, loc), loc)
+
+        index = DefUse([two, square, ret])
+
+        # one user, but two uses, just like `Verify` counts them
+        assert index.users_of(two.sym) == [square]
+        assert index.uses_of(two.sym) == 2
+
+        index.remove(square)
+
+        assert index.uses_of(two.sym) == 0
+
+        for do_opt in (False, True):
+            ir = Opt(syms, do_opt).optimize([two, square, ret])
+
+        assert show(ir) == "t1 = 4\nret t1"
+
+
+class TestVerify:
+    def verify(self, toir: ToIr, ir: List[Tac]):
+        Verify(toir.syms).verify(ir)
+        Verify(toir.syms, debug=True).verify(ir)
+
+    def test_valid(self):
+        toir = build_ir("[\"a\": 1 + 2, \"b\": -3] == [:] & \"#{4}x\" == \"y\"")
+
+        self.verify(toir, toir.ops)
+
+    def test_use_before_def(self):
+        toir = build_ir("1 + 2")
+        one, two, add, ret = toir.ops
+
+        with pytest.raises(MalformedIr):
+            self.verify(toir, [one, add, two, ret])
+
+    def test_double_def(self):
+        toir = build_ir("1 + 2")
+        one, two, add, ret = toir.ops
+
+        with pytest.raises(MalformedIr):
+            self.verify(toir, [one, two, two, add, ret])
+
+    def test_use_count(self):
+        toir = build_ir("1 + 2")
+        toir.ops[0].sym.uses += 1
+
+        with pytest.raises(MalformedIr):
+            self.verify(toir, toir.ops)
@@ -0,0 +1,202 @@
+import test
+
+from nevec.ast.type import Types
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.cfg import Cfg
+from nevec.ir.ir import IBool, IInt, IRet, Tac
+from nevec.ir.live import BlockLiveness, Liveness
+from nevec.ir.reg import InterferenceGraph, LinearScan, copies_in
+from nevec.ir.sym import Lifetime, Syms
+from nevec.ir.toir import ToIr
+from nevec.ir.verify import Verify
+from nevec.lex.tok import Loc
+from nevec.parse.parse import Parse
+
+def build_ir(code: str) -> ToIr:
+    ctx = CompilationContext(code)
+    ast = Parse(code, ctx).parse()
+
+    toir = ToIr(ctx)
+    toir.build_ir(ast)
+
+    return toir
+
+def const(cfg: Cfg, value: int | bool) -> Tac:
+    loc = Loc.new()
+
+    expr = (
+        IBool(value, loc)
+        if isinstance(value, bool)
+        else IInt(value, loc, Types.INT)
+    )
+
+    return Tac(cfg.syms.new_sym(Syms.NO_MOMENT), expr, loc)
+
+def ret(tac: Tac) -> Tac:
+    tac.sym.uses += 1
+
+    return Tac(tac.sym, IRet(tac.sym, tac.loc), tac.loc)
+
+def diamond() -> Cfg:
+    # b0: if true then b1 else b2; both join in b3
+    cfg = Cfg(Syms())
+
+    entry = cfg.entry
+    then, otherwise, join = cfg.new_block(), cfg.new_block(), cfg.new_block()
+
+    cond = const(cfg, True)
+    entry.add(cond)
+    cfg.branch(entry, cond.sym, then, otherwise)
+
+    one = const(cfg, 1)
+    then.add(one)
+    cfg.connect(then, join)
+
+    two = const(cfg, 2)
+    otherwise.add(two)
+    cfg.connect(otherwise, join)
+
+    phi = cfg.phi(join, [(then, one), (otherwise, two)], Loc.new())
+    join.add(ret(phi))
+
+    cfg.number()
+
+    return cfg
+
+class TestLifetime:
+    def test_intersects_with(self):
+        assert Lifetime(0, 2).intersects_with(Lifetime(1, 3))
+        assert not Lifetime(0, 2).intersects_with(Lifetime(2, 3))
+
+        # written at the same moment, even if nothing reads them
+        assert Lifetime(2, 2).intersects_with(Lifetime(2, 4))
+        assert Lifetime(2, 4).intersects_with(Lifetime(2, 2))
+
+    def test_is_valid_in(self):
+        lifetime = Lifetime(1, 3)
+
+        assert [lifetime.is_valid_in(m) for m in range(5)] == [
+            False, True, True, True, False
+        ]
+
+    def test_last_used(self):
+        sym = Syms().new_sym(0)
+
+        sym.last_used(4)
+        sym.last_used(2)
+
+        assert sym.last == 4 and sym.uses == 2
+
+
+class TestLiveness:
+    def test_table(self):
+        toir = build_ir("[1: 2 + 3, 4: 5]")
+        ir = toir.ops
+
+        live = Liveness.of(ir)
+        live.apply(toir.syms, ir)
+
+        Verify(toir.syms).verify(ir)
+
+        # the table sets read their keys and values well after the values
+        # were computed
+        key = ir[7].expr.key.sym
+        assert live.interval(key.id) == (1, 7)
+
+        assert live.live_in(7) == {0, 1, 2, 5, 6}
+        assert live.live_out(7) == {0, 2, 6}
+
+    def test_matches_allocators(self):
+        toir = build_ir("\"a#{1 + 2}b#{3 * 4}\" == \"y\"")
+        ir = toir.ops
+
+        Liveness.of(ir).apply(toir.syms, ir)
+
+        syms = toir.syms.values()
+
+        scan = LinearScan(syms)
+        graph = InterferenceGraph(syms)
+
+        for sym in syms:
+            for other in syms:
+                lifetime, other_lifetime = sym.lifetime, other.lifetime
+                assert lifetime is not None and other_lifetime is not None
+
+                if sym is other:
+                    continue
+
+                if not lifetime.intersects_with(other_lifetime):
+                    continue
+
+                assert scan.get_reg(sym) != scan.get_reg(other)
+                assert graph.get_reg(sym) != graph.get_reg(other)
+
+
+class TestBlockLiveness:
+    def test_diamond(self):
+        cfg = diamond()
+        cond, one, two, phi = cfg.syms.values()
+
+        entry, then, otherwise, join = cfg.blocks
+
+        live = BlockLiveness(cfg)
+
+        assert live.live_out[then.id] == {one.id}
+        assert live.live_out[otherwise.id] == {two.id}
+        assert live.live_in[join.id] == set()
+
+        live.apply(cfg.syms)
+
+        # each branch's value dies at the end of its own block, so both can
+        # share the phi's register
+        one_lifetime, two_lifetime = one.lifetime, two.lifetime
+        assert one_lifetime is not None and two_lifetime is not None
+
+        assert not one_lifetime.intersects_with(two_lifetime)
+
+        graph = InterferenceGraph(
+            cfg.syms.values(),
+            copies=copies_in(cfg.linearize())
+        )
+
+        assert graph.get_reg(one) == graph.get_reg(phi)
+        assert graph.get_reg(two) == graph.get_reg(phi)
+
+    def test_loop(self):
+        cfg = Cfg(Syms())
+
+        head, body, exit = cfg.new_block(), cfg.new_block(), cfg.new_block()
+
+        x = const(cfg, 1)
+        cond = const(cfg, True)
+        cfg.entry.add(x)
+        cfg.entry.add(cond)
+        cfg.connect(cfg.entry, head)
+
+        cfg.branch(head, cond.sym, exit, body)
+
+        y = const(cfg, 2)
+        body.add(y)
+        cfg.connect(body, head)
+
+        exit.add(ret(x))
+
+        cfg.number()
+        cfg.compute_doms()
+
+        live = BlockLiveness(cfg)
+
+        # `x` is only read after the loop, but it has to make it around the
+        # loop first
+        assert x.sym.id in live.live_out[body.id]
+        assert cond.sym.id in live.live_in[body.id]
+
+        live.apply(cfg.syms)
+
+        x_lifetime, y_lifetime = x.sym.lifetime, y.sym.lifetime
+        assert x_lifetime is not None and y_lifetime is not None
+
+        assert x_lifetime.intersects_with(y_lifetime)
+
+        scan = LinearScan(cfg.syms.values())
+        assert scan.get_reg(x.sym) != scan.get_reg(y.sym)
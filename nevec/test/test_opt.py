@@ -0,0 +1,241 @@
+import test
+
+import os
+import pytest
+
+from typing import List
+
+from nevec.ast.type import Types
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.cfg import Cfg
+from nevec.ir.chains import DefUse
+from nevec.ir.ir import *
+from nevec.ir.sym import Syms
+from nevec.ir.toir import ToIr
+from nevec.ir.verify import MalformedIr, Verify
+from nevec.lex.tok import Loc
+from nevec.opt.sccp import Sccp
+from nevec.opt.manager import PassManager
+from nevec.opt.opt import Opt
+from nevec.opt.passes import Pass
+from nevec.parse.parse import Parse
+
+def build_ir(code: str) -> ToIr:
+    ctx = CompilationContext(code)
+    ast = Parse(code, ctx).parse()
+
+    toir = ToIr(ctx)
+    toir.build_ir(ast)
+
+    return toir
+
+def show(ir: List[Tac]) -> str:
+    return "\n".join(map(str, ir))
+
+def const(cfg: Cfg, value: int | bool) -> Tac:
+    loc = Loc.new()
+
+    expr = (
+        IBool(value, loc)
+        if isinstance(value, bool)
+        else IInt(value, loc, Types.INT)
+    )
+
+    return Tac(cfg.syms.new_sym(Syms.NO_MOMENT), expr, loc)
+
+def ret(tac: Tac) -> Tac:
+    tac.sym.uses += 1
+
+    return Tac(tac.sym, IRet(tac.sym, tac.loc), tac.loc)
+
+def diamond() -> Cfg:
+    # b0: if true then b1 else b2; both join in b3
+    cfg = Cfg(Syms())
+
+    entry = cfg.entry
+    then, otherwise, join = cfg.new_block(), cfg.new_block(), cfg.new_block()
+
+    cond = const(cfg, True)
+    entry.add(cond)
+    cfg.branch(entry, cond.sym, then, otherwise)
+
+    one = const(cfg, 1)
+    then.add(one)
+    cfg.connect(then, join)
+
+    two = const(cfg, 2)
+    otherwise.add(two)
+    cfg.connect(otherwise, join)
+
+    phi = cfg.phi(join, [(then, one), (otherwise, two)], Loc.new())
+    join.add(ret(phi))
+
+    cfg.number()
+
+    return cfg
+
+class Nothing(Pass):
+    pass
+
+
+class Needy(Pass):
+    REQUIRES = [DefUse, list]
+
+
+class Careless(Pass):
+    # reads the left operand twice, without telling the index
+    def visit_IBinOp(self, bin_op: IBinOp, ctx: Tac):
+        bin_op.right = bin_op.left
+
+
+class TestPassManager:
+    def test_no_aliasing(self):
+        toir = build_ir("1 + 2")
+
+        Opt(toir.syms, do_opt=True)
+        unoptimized = Opt(toir.syms, do_opt=False)
+
+        assert Sccp not in unoptimized.all_passes
+        assert Sccp not in Opt.UNCONDITIONAL_PASSES
+
+    def test_fixpoint(self):
+        toir = build_ir("1 + 2 * 3 - 4")
+
+        opt = Opt(toir.syms, do_opt=True)
+        ir = opt.optimize(toir.ops)
+        toir.syms.renumber()
+
+        assert show(ir) == "t0 = 3\nret t0"
+
+        report = opt.manager.reports["Sccp"]
+
+        # the last run is the one that finds nothing left to fold
+        assert report.changes == report.runs - 1
+        assert report.delta == -6
+
+    def test_unchanged(self):
+        toir = build_ir("1 + 2")
+        ir = toir.ops
+
+        manager = PassManager(toir.syms)
+        manager.register(Nothing)
+
+        assert manager.run(ir) == ir
+
+        report = manager.reports["Nothing"]
+        assert (report.runs, report.changes, report.delta) == (1, 0, 0)
+
+    def test_verify_counts(self):
+        toir = build_ir("1 + 2")
+
+        manager = PassManager(toir.syms, Verify(toir.syms))
+        manager.register(Careless)
+
+        with pytest.raises(MalformedIr):
+            manager.run(toir.ops)
+
+    def test_analyses(self):
+        toir = build_ir("1 + 2")
+
+        manager = PassManager(toir.syms)
+
+        with pytest.raises(ValueError):
+            manager.register(Needy)
+
+        manager.register_analysis(list, list)
+        manager.register(Needy)
+
+        index = manager.analysis(DefUse, toir.ops)
+        assert manager.analysis(DefUse, toir.ops) is index
+
+        manager.invalidate([list])
+        assert manager.analysis(DefUse, toir.ops) is not index
+
+
+def param(cfg: Cfg) -> Tac:
+    loc = Loc.new()
+
+    sym = cfg.syms.new_sym(Syms.NO_MOMENT)
+
+    return Tac(sym, IParam(0, loc, Types.BOOL), loc)
+
+class TestSccp:
+    def test_straight_line(self):
+        toir = build_ir("\"a#{1 + 2}b#{3 * 4}\" == \"a3b12\"")
+
+        ir = Opt(toir.syms, do_opt=True).optimize(toir.ops)
+        toir.syms.renumber()
+
+        assert show(ir) == "t0 = true\nret t0"
+
+    def test_table_show(self):
+        path = os.path.join(
+            os.path.dirname(__file__),
+            "../../test/expressions/test.neve"
+        )
+
+        with open(path) as file:
+            toir = build_ir(file.read())
+
+        ir = Opt(toir.syms, do_opt=True).optimize(toir.ops)
+        toir.syms.renumber()
+
+        # nothing writes to the table once table propagation is done with it
+        assert show(ir) == (
+            't0 = "My table: [\"hey\": 10, \"1 + 2\": 20]"\nret t0'
+        )
+
+    def test_runtime_errors(self):
+        toir = build_ir("(1 / 0) + 2")
+
+        ir = Opt(toir.syms, do_opt=True).optimize(toir.ops)
+
+        # left for the VM to report
+        assert len(ir) == len(toir.ops)
+
+    def test_prune(self):
+        cfg = diamond()
+        _, one, two, phi = cfg.syms.values()
+
+        Sccp(cfg.syms).optimize_cfg(cfg)
+        Verify(cfg.syms).verify_cfg(cfg, "Sccp")
+
+        entry, then, otherwise, join = cfg.blocks
+
+        assert entry.cond is None and entry.succs == [then]
+        assert otherwise.preds == [] and otherwise.tacs == []
+
+        # the phi only ever sees `one`
+        assert join.phis == []
+        assert show(join.tacs) == f"{phi} = 1\nret {phi}"
+        assert one.uses == 0 and two.uses == 0
+
+    def test_unknown_branch(self):
+        cfg = Cfg(Syms())
+
+        then, otherwise = cfg.new_block(), cfg.new_block()
+        join = cfg.new_block()
+
+        cond = param(cfg)
+        cfg.entry.add(cond)
+        cfg.branch(cfg.entry, cond.sym, then, otherwise)
+
+        one, other = const(cfg, 1), const(cfg, 1)
+
+        then.add(one)
+        cfg.connect(then, join)
+
+        otherwise.add(other)
+        cfg.connect(otherwise, join)
+
+        phi = cfg.phi(join, [(then, one), (otherwise, other)], Loc.new())
+        join.add(ret(phi))
+
+        cfg.number()
+
+        Sccp(cfg.syms).optimize_cfg(cfg)
+        Verify(cfg.syms).verify_cfg(cfg, "Sccp")
+
+        # both ways give the same constant, whichever is taken
+        assert cfg.entry.cond is cond.sym
+        assert show(join.tacs) == f"{phi.sym} = 1\nret {phi.sym}"
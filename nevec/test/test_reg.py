@@ -0,0 +1,379 @@
+import test
+
+import json
+import pytest
+
+from typing import List, Tuple
+
+from nevec.ast.type import Types
+from nevec.compile.compile import Compile
+from nevec.ctx.ctx import CompilationContext
+from nevec.ir.cfg import Cfg
+from nevec.ir.reg import InterferenceGraph, LinearScan, copies_in
+from nevec.ir.ir import IBinOp, IBool, IInt, IRet, Tac
+from nevec.ir.live import Liveness
+from nevec.ir.remat import Remat
+from nevec.ir.spill import RegisterFileTooSmall, Spills
+from nevec.ir.stats import RegallocDump, RegallocStats, interferences
+from nevec.ir.sym import Sym, Syms
+from nevec.ir.toir import ToIr
+from nevec.ir.verify import Verify
+from nevec.lex.tok import Loc
+from nevec.opcode.instr import Instr
+from nevec.opcode.opcode import Opcode
+from nevec.opt.opt import Opt
+from nevec.parse.parse import Parse
+
+def build_ir(code: str) -> ToIr:
+    ctx = CompilationContext(code)
+    ast = Parse(code, ctx).parse()
+
+    toir = ToIr(ctx)
+    toir.build_ir(ast)
+
+    return toir
+
+def const(cfg: Cfg, value: int | bool) -> Tac:
+    loc = Loc.new()
+
+    expr = (
+        IBool(value, loc)
+        if isinstance(value, bool)
+        else IInt(value, loc, Types.INT)
+    )
+
+    return Tac(cfg.syms.new_sym(Syms.NO_MOMENT), expr, loc)
+
+def ret(tac: Tac) -> Tac:
+    tac.sym.uses += 1
+
+    return Tac(tac.sym, IRet(tac.sym, tac.loc), tac.loc)
+
+def diamond() -> Cfg:
+    # b0: if true then b1 else b2; both join in b3
+    cfg = Cfg(Syms())
+
+    entry = cfg.entry
+    then, otherwise, join = cfg.new_block(), cfg.new_block(), cfg.new_block()
+
+    cond = const(cfg, True)
+    entry.add(cond)
+    cfg.branch(entry, cond.sym, then, otherwise)
+
+    one = const(cfg, 1)
+    then.add(one)
+    cfg.connect(then, join)
+
+    two = const(cfg, 2)
+    otherwise.add(two)
+    cfg.connect(otherwise, join)
+
+    phi = cfg.phi(join, [(then, one), (otherwise, two)], Loc.new())
+    join.add(ret(phi))
+
+    cfg.number()
+
+    return cfg
+
+def intervals(*lifetimes: tuple) -> List[Sym]:
+    syms = Syms()
+
+    made = []
+    for first, last in lifetimes:
+        sym = syms.new_sym(first)
+        sym.last_used(last)
+
+        made.append(sym)
+
+    return made
+
+class TestLinearScan:
+    def test_reuse(self):
+        syms = intervals((0, 2), (1, 2), (2, 3), (3, 4))
+        scan = LinearScan(syms)
+
+        assert [scan.get_reg(s) for s in syms] == [0, 1, 0, 0]
+        assert scan.reg_count == 2
+
+    def test_matches_graph(self):
+        toir = build_ir("[\"a\": 1 + 2, \"b\": -3] == [:] & \"#{4}x\" == \"y\"")
+        syms = toir.syms.values()
+
+        scan = LinearScan(syms)
+        graph = InterferenceGraph(syms)
+
+        assert [scan.get_reg(s) for s in syms] == [graph.get_reg(s) for s in syms]
+
+    def test_large(self):
+        syms = intervals(*((i, i + 3) for i in range(50000)))
+        scan = LinearScan(syms)
+
+        assert scan.reg_count == 3
+
+class TestInterferenceGraph:
+    def test_edges(self):
+        # includes lifetimes that end where they start
+        syms = intervals(*((i // 2, i // 2 + i % 3) for i in range(40)))
+        graph = InterferenceGraph(syms)
+
+        for sym in syms:
+            for other in syms:
+                if sym is other:
+                    continue
+
+                lifetime, other_lifetime = sym.lifetime, other.lifetime
+                assert lifetime is not None and other_lifetime is not None
+
+                expected = lifetime.intersects_with(other_lifetime)
+                found = graph.interferes(graph.vertex(sym), graph.vertex(other))
+
+                assert found == expected
+
+    def test_orders(self):
+        # created out of order, which makes colouring them in that order
+        # waste a register
+        syms = intervals((3, 5), (1, 2), (2, 5), (1, 3))
+
+        def reg_count(order: str) -> int:
+            graph = InterferenceGraph(syms, order=order)
+
+            return 1 + max(graph.get_reg(s) for s in syms)
+
+        assert reg_count("creation") == 3
+        assert reg_count("smallest-last") == 2
+        assert reg_count("dsatur") == 2
+
+    def test_large(self):
+        syms = intervals(*((i, i + 3) for i in range(50000)))
+        graph = InterferenceGraph(syms)
+
+        assert max(graph.get_reg(s) for s in syms) == 2
+
+
+class TestCoalescing:
+    def test_copy(self):
+        a, b, c = intervals((0, 2), (1, 3), (3, 5))
+
+        for allocate in (LinearScan, InterferenceGraph):
+            plain = allocate([a, b, c])
+            assert plain.get_reg(c) == plain.get_reg(a)
+
+            coalesced = allocate([a, b, c], copies=[(c, b)])
+            assert coalesced.get_reg(c) == coalesced.get_reg(b)
+
+    def test_reg_count(self):
+        a, b, c = intervals((0, 2), (1, 3), (3, 5))
+
+        # `a` already takes up the only register there is to spare
+        graph = InterferenceGraph([a, b, c], copies=[(c, b)], reg_count=1)
+
+        assert graph.get_reg(c) != graph.get_reg(b)
+
+    def test_interfering(self):
+        a, b = intervals((0, 2), (1, 3))
+
+        for allocate in (LinearScan, InterferenceGraph):
+            allocation = allocate([a, b], copies=[(b, a)])
+
+            assert allocation.get_reg(a) != allocation.get_reg(b)
+
+    def test_phi(self):
+        cfg = diamond()
+        _, one, two, phi = cfg.syms.values()
+
+        assert copies_in(cfg.linearize()) == [(phi, one), (phi, two)]
+
+
+class Recorder(Compile):
+    def __init__(self, *args):
+        super().__init__(*args)
+
+        self.instrs: List[Instr] = []
+
+    def emit(self, instr: Instr, line: int):
+        self.instrs.append(instr)
+
+        super().emit(instr, line)
+
+def run(instrs: List[Instr], consts: List, max_regs: int) -> int:
+    # just enough of the VM to run arithmetic
+    regs = {}
+    slots = {}
+
+    for instr in instrs:
+        op, args = instr.opcode, instr.operands
+
+        # the first operand is always a register
+        assert args[0] < max_regs
+
+        match op:
+            case Opcode.PUSH:
+                regs[args[0]] = consts[args[1]].value
+
+            case Opcode.ONE:
+                regs[args[0]] = 1
+
+            case Opcode.ADD:
+                regs[args[0]] = regs[args[1]] + regs[args[2]]
+
+            case Opcode.SPILL:
+                slots[args[1] | args[2] << 8] = regs[args[0]]
+
+            case Opcode.RELOAD:
+                regs[args[0]] = slots[args[1] | args[2] << 8]
+
+            case Opcode.RET:
+                return regs[args[0]]
+
+    raise ValueError("no ret")
+
+def compile_with(
+    code: str,
+    max_regs: int,
+    allocate,
+    remat: bool=False
+) -> Tuple[Spills, int]:
+    ctx = CompilationContext(code)
+    ast = Parse(code, ctx).parse()
+
+    toir = ToIr(ctx)
+    ir = Opt(toir.syms, do_opt=False).optimize(toir.build_ir(ast))
+
+    if remat:
+        ir = Remat(toir.syms).rematerialize(ir)
+
+    Liveness.of(ir).apply(toir.syms, ir)
+
+    spills = Spills(toir.syms.values(), ir, max_regs)
+
+    compile = Recorder(allocate(spills.kept), ctx, spills)
+    compile.compile(ir)
+
+    return spills, run(compile.instrs, compile.consts, max_regs)
+
+class Unbounded(LinearScan):
+    # a register for every symbol, never mind how many there are
+    def get_reg(self, sym: Sym) -> int:
+        return sym.id
+
+class TestSpills:
+    # 1 + (2 + (3 + ... + (12 + 13)))
+    CODE = " + (".join(map(str, range(1, 14))) + ")" * 12
+
+    def test_no_spills(self):
+        spills, result = compile_with(self.CODE, 256, LinearScan)
+
+        assert len(spills) == 0 and spills.peak == 13
+        assert result == 91
+
+    def test_spills(self):
+        # compiling also checks that nothing landed in a scratch register
+        for allocate in (LinearScan, InterferenceGraph):
+            for max_regs in (2, 3, 5, 8):
+                spills, result = compile_with(self.CODE, max_regs, allocate)
+
+                assert len(spills) > 0
+                assert result == 91
+
+    def test_too_small(self):
+        with pytest.raises(RegisterFileTooSmall):
+            compile_with(self.CODE, 1, LinearScan)
+
+    def test_scratch_clash(self):
+        with pytest.raises(ValueError):
+            compile_with(self.CODE, 5, Unbounded)
+
+
+class TestRemat:
+    def test_pressure(self):
+        spills, result = compile_with(TestSpills.CODE, 256, LinearScan, True)
+
+        # every number is only pushed right before it's added
+        assert spills.peak == 2
+        assert result == 91
+
+    def test_copies(self):
+        syms = Syms()
+        loc = Loc.new()
+
+        # t0 = 2; t1 = 3; t2 = t0 * t1; t3 = t0 + t2; ret t3
+        two = Tac(syms.new_sym(0), IInt(2, loc, Types.INT), loc)
+        three = Tac(syms.new_sym(1), IInt(3, loc, Types.INT), loc)
+
+        def bin_op(moment, op, lexeme, left, right) -> Tac:
+            left.sym.last_used(moment)
+            right.sym.last_used(moment)
+
+            expr = IBinOp(
+                left.operand(),
+                op,
+                right.operand(),
+                lexeme,
+                loc,
+                Types.INT
+            )
+
+            return Tac(syms.new_sym(moment), expr, loc)
+
+        mul = bin_op(2, IBinOp.Op.MUL, "*", two, three)
+        add = bin_op(3, IBinOp.Op.ADD, "+", two, mul)
+
+        add.sym.uses += 1
+        ret = Tac(add.sym, IRet(add.sym, loc), loc)
+
+        remat = Remat(syms)
+        ir = remat.rematerialize([two, three, mul, add, ret])
+
+        assert remat.copies == 1
+        assert "\n".join(map(str, ir)) == "\n".join([
+            "t0 = 2",
+            "t1 = 3",
+            "t2 = t0 * t1",
+            "t4 = 2",
+            "t3 = t4 + t2",
+            "ret t3"
+        ])
+
+        Liveness.of(ir).apply(syms, ir)
+        Verify(syms, debug=True).verify(ir)
+
+
+class TestRegallocStats:
+    def test_interferences(self):
+        syms = intervals(*((i // 2, i // 2 + i % 3) for i in range(40)))
+
+        pairs = set((a.id, b.id) for a, b in interferences(syms))
+
+        graph = InterferenceGraph(syms)
+        expected = set(
+            (a.id, b.id)
+            for a in syms
+            for b in syms
+            if a.id < b.id
+            if graph.interferes(graph.vertex(a), graph.vertex(b))
+        )
+
+        assert set((min(p), max(p)) for p in pairs) == expected
+        assert len(pairs) == len(expected)
+
+    def test_stats(self):
+        syms = intervals((0, 2), (1, 2), (2, 3), (3, 4))
+        scan = LinearScan(syms)
+
+        stats = RegallocStats(syms, scan, Spills(syms, []), 0.0)
+
+        assert stats.vertices == 4
+        assert stats.edges == 1
+        assert stats.max_clique == stats.registers == 2
+        assert stats.spills == 0
+
+    def test_dump(self):
+        syms = intervals((0, 2), (1, 2))
+        dump = RegallocDump(syms, LinearScan(syms), Spills(syms, []))
+
+        dumped = json.loads(dump.to_json())
+
+        assert [i["reg"] for i in dumped["intervals"]] == [0, 1]
+        assert dumped["edges"] == [["t0", "t1"]]
+
+        assert "t0 -- t1;" in dump.to_dot()